@@ -3,7 +3,10 @@ from drv_START import DRV
 def main():
 
     # the assignment suggests this distribution should range from 1.5 to 3
-    R_star = DRV(dist=None, type='uniform', min=1.5, max=3.0, bins=10)
+    # the product below is computed in the log domain, merging values within 0.1% of each other,
+    # and keeps at most 2000 log-spaced values; neither changes the expected value
+    R_star = DRV(dist=None, type='uniform', min=1.5, max=3.0, bins=10, max_support=2000, rebin_method='log',
+                 log_grid=1e-3)
 
 
     '''Fraction of stars with planets: The assignment suggests a number approaching one here.
@@ -43,5 +46,10 @@ def main():
     expected_value = N.E()
     print(f'I estimate that the universe has {int(expected_value)} planets that we can potentially communicate with!')
 
+    # cross-check the exact result against a Monte Carlo estimate
+    estimate = N.simulate(10**6, seed=0)
+    low, high = estimate.ci()
+    print(f'From {estimate.n} samples, the 95% confidence interval is {int(low)} to {int(high)} planets.')
+
 
 main()
\ No newline at end of file
@@ -6,23 +6,80 @@ Created on Fri Mar  5 13:50:40 2021
 @author: rachlin
 """
 # import needed packages
-import copy
-from collections import defaultdict
+import heapq
+import math
 import seaborn as sns
 import numpy as np
 import matplotlib.pyplot as plt
+from montecarlo import simulate
+
+
+class _Arithmetic:
+    """ Operators shared by DRVs and DRV expressions: each one builds a lazy
+    DRVExpression instead of computing a distribution """
+
+    def __add__(self, other):
+        """ Add two discrete random variables (or a scalar) """
+        return DRVExpression('add', [self, other])
+
+    def __radd__(self, a):
+        """ Add a scalar, a, by the DRV """
+        return DRVExpression('add', [a, self])
+
+    def __sub__(self, other):
+        """ Subtract two discrete random variables (or a scalar) """
+        if isinstance(other, _Arithmetic):
+            return DRVExpression('add', [self, DRVExpression('mul', [other, -1])])
+        return DRVExpression('add', [self, -other])
+
+    def __rsub__(self, a):
+        """ Subtract scalar - drv """
+        return DRVExpression('add', [a, DRVExpression('mul', [self, -1])])
+
+    def __mul__(self, other):
+        """ Multiply two discrete random variables (or a scalar) """
+        return DRVExpression('mul', [self, other])
+
+    def __rmul__(self, a):
+        """ Multiply a scalar, a, by the DRV """
+        return DRVExpression('mul', [a, self])
+
+    def simulate(self, samples=10**6, **kwargs):
+        """ Monte Carlo estimate from samples instead of the exact distribution
+        (see montecarlo.simulate for the options) """
+        return simulate(self, samples, **kwargs)
+
+
+class DRV(_Arithmetic):
+    """ A discrete random variable stored as two NumPy arrays: the distinct
+    values in increasing order and their probabilities. Arithmetic between
+    independent DRVs works on the outer product of the two supports; the
+    operators build a lazy DRVExpression that is only computed when needed.
+    With max_support set (here, or on the class for every DRV), a result with more
+    values than that is rebinned (see rebin), so long chains stay bounded.
+    With log_grid set, products of non-negative DRVs are computed in the log domain
+    (see DRVExpression.compute). """
+
+    # default support policy for DRVs that do not set their own
+    max_support = None
+    rebin_method = 'quantile'
+    log_grid = None
 
-class DRV:
-    
     def __init__(self, dist=None, **kwargs):
         """ Constructor
          dist: Dictionary of value:probability pairs
-         kwargs: misc parameters for other types of distributions """
-        # create a dictionary if none is given
-        if dist is None:
-            self.dist = dict() # Empty distribution
-        else:
-            self.dist = copy.deepcopy(dist)
+         kwargs: misc parameters for other types of distributions, plus
+         max_support / rebin_method: support limit and rebinning method ('quantile', 'log' or 'width')
+         for this DRV and the results of its operations
+         log_grid: width of the log-domain cells that product values are merged into
+         (1e-9 only merges float noise; 0.01 gives cells about 1% wide) """
+        values, probabilities = [], []
+        if 'max_support' in kwargs:
+            self.max_support = kwargs['max_support']
+        if 'rebin_method' in kwargs:
+            self.rebin_method = kwargs['rebin_method']
+        if 'log_grid' in kwargs:
+            self.log_grid = kwargs['log_grid']
 
         # get the type of distribution from the kwargs parameters, with the distribution type defaulting to discrete.
         dtype = kwargs.get('type', 'discrete')
@@ -33,121 +90,180 @@ class DRV:
             maxval = kwargs.get('max', 1.0)
             bins = kwargs.get('bins', 10)
 
-            self.values = np.linspace(minval, maxval, bins)
-            self.probabilities = np.array([1.0 / bins for i in range(bins)])
-            self.dist = {v: p for v, p in zip(self.values, self.probabilities)}
+            values = np.linspace(minval, maxval, bins)
+            probabilities = np.full(bins, 1.0 / bins)
 
         # if the dtype is normal, use the mean, stdev, and bins args to calculate the values and probability dist.
         elif dtype == 'normal':
-            self.dist = {}
             mean = kwargs.get('mean', 0.0)
             stdev = kwargs.get('stdev', 1.0)
             bins = kwargs.get('bins', 10)
 
             # use the Gaussian equation for estimating levels in a normal distribution
-            self.values = np.linspace(mean - 3 * stdev, mean + 3 * stdev, bins)
-            pdf_vals = np.exp(-0.5 * ((self.values - mean) / stdev) ** 2)
-            self.probabilities = pdf_vals / pdf_vals.sum()
-            self.dist = {v: p for v, p in zip(self.values, self.probabilities)}
+            values = np.linspace(mean - 3 * stdev, mean + 3 * stdev, bins)
+            pdf_vals = np.exp(-0.5 * ((values - mean) / stdev) ** 2)
+            probabilities = pdf_vals / pdf_vals.sum()
 
-        # if dtype is discrete use the values and probabilities params to create the distribution.
+        # if dtype is discrete use the dist dictionary, or the values and probabilities params.
         elif dtype == 'discrete':
-            self.values = kwargs.get('values', [])
-            self.probabilities = kwargs.get('probabilities', [])
-            if len(self.values) != len(self.probabilities):
+            if dist is not None:
+                values, probabilities = list(dist.keys()), list(dist.values())
+            else:
+                values = kwargs.get('values', [])
+                probabilities = kwargs.get('probabilities', [])
+            if len(values) != len(probabilities):
                 print("Values and probabilities must be the same length")
+                n = min(len(values), len(probabilities))
+                values, probabilities = values[:n], probabilities[:n]
+
+        self.values, self.probabilities = DRV._merge(values, probabilities)
+        self._limit()
+
+    @staticmethod
+    def _merge(values, probabilities):
+        """ Sort the values and add up the probabilities of equal ones """
+        values = np.asarray(values, dtype=float).ravel()
+        probabilities = np.asarray(probabilities, dtype=float).ravel()
+        unique, inverse = np.unique(values, return_inverse=True)
+        return unique, np.bincount(inverse.ravel(), weights=probabilities, minlength=len(unique))
+
+    @classmethod
+    def from_arrays(cls, values, probabilities, max_support=None, rebin_method=None, log_grid=None):
+        """ A DRV from value and probability arrays (equal values are merged),
+        with an optional support policy (the class defaults otherwise) """
+        drv = cls.__new__(cls)
+        if max_support is not None:
+            drv.max_support = max_support
+        if rebin_method is not None:
+            drv.rebin_method = rebin_method
+        if log_grid is not None:
+            drv.log_grid = log_grid
+        drv.values, drv.probabilities = DRV._merge(values, probabilities)
+        drv._limit()
+        return drv
+
+    def _limit(self):
+        """ Apply the support policy: rebin if there are more than max_support values """
+        if self.max_support is not None and len(self.values) > self.max_support:
+            self.values, self.probabilities = DRV._rebin(self.values, self.probabilities,
+                                                         self.max_support, self.rebin_method)
+
+    def rebin(self, max_support, method='quantile'):
+        """ A copy with at most max_support values, keeping the mean and total probability.
+        Values are grouped into bins and each bin is replaced by its probability-weighted
+        mean carrying the bin's total probability. method picks the bins:
+        'quantile': bins of about equal probability
+        'log': log-spaced bins (zero and negative values are pooled into one bin)
+        'width': equal-width bins """
+        return DRV.from_arrays(*DRV._rebin(self.values, self.probabilities, max_support, method),
+                               **DRV._policy([self]))
+
+    @staticmethod
+    def _rebin(values, probabilities, max_support, method):
+        """ Rebinned (values, probabilities) of sorted values; see rebin """
+        if len(values) <= max_support:
+            return values, probabilities
+        if method == 'quantile':
+            # bin by the probability mass below each value
+            below = np.cumsum(probabilities) - probabilities
+            bins = np.minimum((below / probabilities.sum() * max_support).astype(int), max_support - 1)
+        elif method == 'log':
+            # log-spaced bins over the positive values; zero and negative values share bin 0
+            positive = values > 0
+            if not positive.any():
+                return DRV._rebin(values, probabilities, max_support, 'width')
+            low = int(not positive.all())
+            edges = np.geomspace(values[positive][0], values[-1], max_support - low + 1)
+            bins = np.zeros(len(values), dtype=int)
+            bins[positive] = low + np.clip(np.searchsorted(edges, values[positive], side='right') - 1,
+                                           0, max_support - low - 1)
+        elif method == 'width':
+            edges = np.linspace(values[0], values[-1], max_support + 1)
+            bins = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, max_support - 1)
+        else:
+            raise ValueError(f"Unknown rebinning method: {method}")
 
-            self.dist = {v: p for v, p in zip(self.values, self.probabilities)}
+        # each non-empty bin becomes one value at its weighted mean; bins are contiguous
+        # runs of sorted values, so the new values stay sorted
+        mass = np.bincount(bins, weights=probabilities, minlength=max_support)
+        moment = np.bincount(bins, weights=values * probabilities, minlength=max_support)
+        keep = mass > 0
+        return moment[keep] / mass[keep], mass[keep]
+
+    @property
+    def dist(self):
+        """ Dictionary of value:probability pairs """
+        return dict(zip(self.values.tolist(), self.probabilities.tolist()))
 
     def E(self):
         """ Expected value E[X] """
-        return sum(v * p for v, p in zip(self.values, self.probabilities))
-
-    def __add__(self, other):
-        """ Add two discrete random variables """
-        new_probabilities = defaultdict(float)
-
-        # iterate through the values and probabilities and add accordingly
-        for v,p in zip(self.values,self.probabilities):
-            for v1, p1 in zip(other.values, other.new_probabilities):
-                new_val = v + v1
-                new_probabilities[new_val] += p*p1
-
-        new_values = list(new_probabilities.keys())
-        new_probs = list(new_probabilities.values())
-
-        return DRV(values=new_values, probabilities=new_probs)
-
-    def __radd__(self, a):
-        """ Add a scalar, a, by the DRV """
-        new_vals = [v+a for v in self.values]
-        return DRV(values=new_vals, probabilities=self.probabilities)
-
-    def __sub__(self, other):
-        """ Subtract two discrete random variables  """
-
-        sub_probabilities = defaultdict(float)
-        # iterate through the values and probabilities and subtract accordingly
-        for v,p in zip(self.values,self.probabilities):
-            for v1,p1 in zip(other.values,other.probabilities):
-                sub_val = v - v1
-                sub_probabilities[sub_val] += p*p1
-        
-        new_values = list(sub_probabilities.keys())
-        new_probs = list(sub_probabilities.values())
-
-        return DRV(values=new_values, probabilities=new_probs)
-
-    def __rsub__(self, a):
-        """ Subtract scalar - drv """
-
-        new_vals = [a - v for v in self.values]
-        return DRV(values=new_vals, probabilities=self.probabilities)
-
-    def __mul__(self, other):
-        """ Multiply two discrete random variables  """
-
-        mul_probabilities = defaultdict(float)
-
-        # iterate through the values and probabilities and multiply accordingly
-        for v, p in zip(self.values, self.probabilities):
-            for v1, p1 in zip(other.values, other.probabilities):
-                mul_val = v * v1
-                mul_probabilities[mul_val] += p * p1
-
-        new_values = list(mul_probabilities.keys())
-        new_probs = list(mul_probabilities.values())
-
-        return DRV(values=new_values, probabilities=new_probs)
-
-    def __rmul__(self, a):
-        """ Multiply a scalar, a, by the DRV """
-        new_vals = [a * v for v in self.values]
-        return DRV(values=new_vals, probabilities=self.probabilities)
+        return float(np.dot(self.values, self.probabilities))
+
+    def compute(self):
+        """ The distribution itself (a DRV is already computed) """
+        return self
+
+    def sample(self, n, rng):
+        """ n independent draws from the distribution, using rng (a numpy Generator) """
+        return rng.choice(self.values, size=n, p=self.probabilities / self.probabilities.sum())
+
+    def bounds(self):
+        """ Smallest and largest value """
+        return float(self.values[0]), float(self.values[-1])
+
+    def positive_floor(self):
+        """ Smallest positive value (None if there is none) """
+        positive = self.values[self.values > 0]
+        return float(positive[0]) if len(positive) else None
+
+    @staticmethod
+    def _policy(drvs):
+        """ Support policy for a result of drvs: the tighter max_support, with its method,
+        and the finer log_grid """
+        limits = [(drv.max_support, drv.rebin_method) for drv in drvs if drv.max_support is not None]
+        max_support, rebin_method = min(limits, key=lambda limit: limit[0]) if limits else (None, drvs[0].rebin_method)
+        grids = [drv.log_grid for drv in drvs if drv.log_grid is not None]
+        return {'max_support': max_support, 'rebin_method': rebin_method, 'log_grid': min(grids) if grids else None}
+
+    def _apply(self, other, op):
+        """ Combine with another independent DRV over every pair of values,
+        or with a scalar value by value """
+        if isinstance(other, DRV):
+            values = op.outer(self.values, other.values)
+            probabilities = np.multiply.outer(self.probabilities, other.probabilities)
+            return DRV.from_arrays(values, probabilities, **DRV._policy([self, other]))
+        return DRV.from_arrays(op(self.values, other), self.probabilities, **DRV._policy([self]))
 
     def __repr__(self):
         """ Human-readable string representation of the DRV
         Display each value:probability pair on a separate line.
         Round all probabilities to 5 decimal places. """
-        return "\n".join(f"{v}: {round(p, 5)}" for v, p in self.dist.items())
+        return "\n".join(f"{v}: {round(p, 5)}" for v, p in zip(self.values.tolist(), self.probabilities.tolist()))
 
     def plot(self, title=None, xscale=None, yscale=None, show_cumulative=False, discrete=False,
-             savefig=None, figsize=(4, 4)):
+             savefig=None, figsize=(4, 4), log_bins=200):
         """ Display the DRV distribution
         title: The title of the figure
-        xscale: If 'log' then log-scale the x axis
+        xscale: If 'log' then log-scale the x axis, with at most log_bins log-spaced bins
         yscale: If 'log' then log-scale the y axis
         show_cummulative: If True, overlay the cummulative distribution line
         savefig: Name of .png file to save plot
         figsize: Default figure size"""
 
-        # separate self.dist into a list of values and probabilities
-        values, probabilities = zip(*sorted(self.dist.items()))
-        values = np.array(values).flatten()
-        probabilities = np.array(probabilities).flatten()
+        # values are kept sorted, so they plot as they are
+        values = self.values
+        probabilities = self.probabilities
+        cumulative_probs = np.cumsum(probabilities)
+
+        # on a log x axis only positive values can be shown; bin them on a fixed log grid
+        bins = len(values)
+        if xscale:
+            positive = values > 0
+            values, probabilities, cumulative_probs = values[positive], probabilities[positive], cumulative_probs[positive]
+            bins = np.geomspace(values[0], values[-1], min(len(values), log_bins) + 1)
 
         sns.histplot(x=values, weights=probabilities, discrete=discrete,
-                     color="blue",bins=len(values), label="Probability Mass Function (PMF)")
+                     color="blue",bins=bins, label="Probability Mass Function (PMF)")
 
         # rescale the axes if the user called upon this in the function call.
         if xscale:
@@ -157,7 +273,6 @@ class DRV:
 
         # show the cumulative probabilities if the user calls upon it in the function call.
         if show_cumulative:
-            cumulative_probs = np.cumsum(probabilities)
             plt.step(values, cumulative_probs, label='Cumulative', color="red", where="post")
             #plt.plot(values, cumulative_probs, label='Cumulative', color="red")
 
@@ -169,4 +284,179 @@ class DRV:
         plt.grid(True)
 
         # Show the plot
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+
+class DRVExpression(_Arithmetic):
+    """ A lazy sum or product of independent DRVs, expressions and scalars.
+    Nested sums (and nested products) are flattened into one node and their scalars
+    folded into a single constant, so X * 2 * Y * 3 is computed as 6 * X * Y.
+    E() needs no distribution at all; compute(), plot() and the DRV attributes
+    evaluate the expression once and keep the result. """
+
+    def __init__(self, op, operands):
+        """ op: 'add' or 'mul'
+        operands: DRVs, DRVExpressions and scalars """
+        self.op = op
+        self.terms = []
+        self.constant = 0 if op == 'add' else 1
+        for operand in operands:
+            if isinstance(operand, DRVExpression) and operand.op == op:
+                self.terms.extend(operand.terms)
+                self._fold(operand.constant)
+            elif isinstance(operand, _Arithmetic):
+                self.terms.append(operand)
+            else:
+                self._fold(operand)
+        self._result = None
+
+    def _fold(self, scalar):
+        """ Fold a scalar operand into the node's constant """
+        if self.op == 'add':
+            self.constant = self.constant + scalar
+        else:
+            self.constant = self.constant * scalar
+
+    def E(self):
+        """ Expected value E[X], from the expectations of the terms: a sum's is the sum
+        of theirs and, since the terms are independent, a product's is their product """
+        if self.op == 'add':
+            return float(self.constant + sum(term.E() for term in self.terms))
+        return float(self.constant * math.prod(term.E() for term in self.terms))
+
+    def sample(self, n, rng):
+        """ n independent draws of the expression, evaluated elementwise from draws of its terms """
+        samples = np.full(n, self.constant, dtype=float)
+        for term in self.terms:
+            if self.op == 'add':
+                samples += term.sample(n, rng)
+            else:
+                samples *= term.sample(n, rng)
+        return samples
+
+    def bounds(self):
+        """ Smallest and largest value the expression can take (interval arithmetic on its terms) """
+        low = high = float(self.constant)
+        for term in self.terms:
+            term_low, term_high = term.bounds()
+            if self.op == 'add':
+                low, high = low + term_low, high + term_high
+            else:
+                products = (low * term_low, low * term_high, high * term_low, high * term_high)
+                low, high = min(products), max(products)
+        return low, high
+
+    def positive_floor(self):
+        """ A lower bound on the positive values the expression can take, for sums and products
+        of non-negative terms (None otherwise, or if it can take no positive value) """
+        floors = [term.positive_floor() for term in self.terms]
+        if self.constant < 0 or any(term.bounds()[0] < 0 for term in self.terms) or None in floors:
+            return None
+        if self.op == 'add':
+            # a positive constant bounds every sum; otherwise a positive sum has a positive term
+            return float(self.constant) if self.constant > 0 else min(floors)
+        return float(self.constant * math.prod(floors)) if self.constant > 0 else None
+
+    def compute(self):
+        """ The distribution of the expression as a DRV.
+        Terms are combined smallest support first, so intermediate results stay as
+        small as possible, and the constant is applied to the smallest term.
+        With a log_grid policy, a product of non-negative terms is computed in the log domain. """
+        if self._result is None:
+            ufunc = np.add if self.op == 'add' else np.multiply
+            drvs = [term.compute() for term in self.terms]
+            policy = DRV._policy(drvs)
+            if (self.op == 'mul' and policy['log_grid'] is not None and self.constant > 0
+                    and all(drv.values[0] >= 0 for drv in drvs)):
+                self._result = DRVExpression._log_product(drvs, self.constant, policy)
+                return self._result
+
+            if self.constant != (0 if self.op == 'add' else 1):
+                smallest = min(range(len(drvs)), key=lambda i: len(drvs[i].values))
+                drvs[smallest] = drvs[smallest]._apply(self.constant, ufunc)
+
+            heap = [(len(drv.values), i, drv) for i, drv in enumerate(drvs)]
+            heapq.heapify(heap)
+            count = len(heap)
+            while len(heap) > 1:
+                _, _, a = heapq.heappop(heap)
+                _, _, b = heapq.heappop(heap)
+                result = a._apply(b, ufunc)
+                heapq.heappush(heap, (len(result.values), count, result))
+                count += 1
+            self._result = heap[0][2]
+        return self._result
+
+    @staticmethod
+    def _log_product(drvs, constant, policy):
+        """ Product of non-negative DRVs (times a positive constant) in the log domain.
+        Values are kept as logs, so products become sums and magnitudes from fractions to
+        lifetimes stay exact; the probability of zero is tracked on its own. After each step,
+        values in the same log_grid-wide cell are merged into their mean. """
+        factors = []
+        for drv in drvs:
+            keep = (drv.values > 0) & (drv.probabilities > 0)
+            factors.append((np.log(drv.values[keep]), drv.probabilities[keep]))
+        zero = 0.0
+        if any(len(logs) < len(drv.values) for drv, (logs, _) in zip(drvs, factors)):
+            # the mass of products with a zero factor: whatever the positive parts leave out
+            zero = math.prod(drv.probabilities.sum() for drv in drvs) - math.prod(p.sum() for _, p in factors)
+
+        smallest = min(range(len(factors)), key=lambda i: len(factors[i][0]))
+        factors[smallest] = (factors[smallest][0] + math.log(constant), factors[smallest][1])
+
+        heap = [(len(logs), i, logs, probabilities) for i, (logs, probabilities) in enumerate(factors)]
+        heapq.heapify(heap)
+        count = len(heap)
+        while len(heap) > 1:
+            _, _, logs_a, probabilities_a = heapq.heappop(heap)
+            _, _, logs_b, probabilities_b = heapq.heappop(heap)
+            logs, probabilities = DRVExpression._log_merge(np.add.outer(logs_a, logs_b).ravel(),
+                                                           np.multiply.outer(probabilities_a, probabilities_b).ravel(),
+                                                           policy)
+            heapq.heappush(heap, (len(logs), count, logs, probabilities))
+            count += 1
+        _, _, logs, probabilities = heap[0]
+
+        if zero > 0:
+            return DRV.from_arrays(np.concatenate(([0.0], np.exp(logs))), np.concatenate(([zero], probabilities)),
+                                   **policy)
+        return DRV.from_arrays(np.exp(logs), probabilities, **policy)
+
+    @staticmethod
+    def _log_merge(logs, probabilities, policy):
+        """ Merge log values into log_grid-wide cells (keeping the mean), then apply max_support """
+        grid = policy['log_grid']
+        cells, inverse = np.unique(np.floor(logs / grid), return_inverse=True)
+        edges = cells * grid
+        mass = np.bincount(inverse, weights=probabilities)
+        # the weighted mean of a cell, relative to its lower edge so exp stays near 1
+        moment = np.bincount(inverse, weights=probabilities * np.exp(logs - edges[inverse]))
+        logs = edges + np.log(moment / mass)
+
+        if policy['max_support'] is not None and len(logs) > policy['max_support']:
+            values, mass = DRV._rebin(np.exp(logs), mass, policy['max_support'], policy['rebin_method'])
+            logs = np.log(values)
+        return logs, mass
+
+    @property
+    def values(self):
+        return self.compute().values
+
+    @property
+    def probabilities(self):
+        return self.compute().probabilities
+
+    @property
+    def dist(self):
+        return self.compute().dist
+
+    def rebin(self, max_support, method='quantile'):
+        return self.compute().rebin(max_support, method)
+
+    def plot(self, *args, **kwargs):
+        """ Display the distribution of the expression (see DRV.plot) """
+        self.compute().plot(*args, **kwargs)
+
+    def __repr__(self):
+        return repr(self.compute())
@@ -0,0 +1,183 @@
+"""
+Monte Carlo estimates for DRVs and DRV expressions.
+
+Instead of building the exact distribution, draw samples of every leaf DRV
+and evaluate the expression elementwise. Samples are drawn in fixed-size
+chunks, so memory stays bounded however many are taken, and the chunks can
+be spread over several processes. Each chunk has its own seed spawned from
+one SeedSequence, so a given seed gives the same result for any number of
+processes.
+
+    result = simulate(N, samples=10**8, seed=0, processes=8)
+    result.E(), result.ci(), result.quantile([0.05, 0.5, 0.95])
+"""
+
+import multiprocessing as mp
+from statistics import NormalDist
+import numpy as np
+import matplotlib.pyplot as plt
+
+# expression and histogram edges of a worker process (set by _init_worker)
+_WORKER = {}
+
+
+class MonteCarloResult:
+    """ Moments and a histogram accumulated from samples of an expression """
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, samples):
+        """ Accumulate a chunk of samples """
+        bins = np.clip(np.searchsorted(self.edges, samples, side='right') - 1, 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        chunk = MonteCarloResult.__new__(MonteCarloResult)
+        chunk.n, chunk.mean = len(samples), float(samples.mean())
+        chunk.m2 = float(((samples - chunk.mean) ** 2).sum())
+        chunk.min, chunk.max = float(samples.min()), float(samples.max())
+        self._combine_moments(chunk)
+
+    def merge(self, other):
+        """ Accumulate another result over the same edges """
+        self.counts += other.counts
+        self._combine_moments(other)
+
+    def _combine_moments(self, other):
+        # Chan et al.'s pairwise update of the mean and sum of squared deviations
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def E(self):
+        """ Estimated expected value """
+        return self.mean
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.var ** 0.5
+
+    @property
+    def stderr(self):
+        """ Standard error of the mean """
+        return self.std / self.n ** 0.5 if self.n else np.inf
+
+    def ci(self, level=0.95):
+        """ Normal confidence interval for the expected value """
+        z = NormalDist().inv_cdf((1 + level) / 2)
+        return self.mean - z * self.stderr, self.mean + z * self.stderr
+
+    def quantile(self, q):
+        """ Quantile(s) q, interpolated within the histogram bins
+        (accurate to about one bin width) """
+        cdf = np.concatenate(([0.0], np.cumsum(self.counts) / self.n))
+        return np.interp(q, cdf, self.edges)
+
+    def histogram(self, level=0.95):
+        """ Probability of each bin with a normal confidence interval.
+        Returns (edges, probabilities, low, high) """
+        p = self.counts / self.n
+        half = NormalDist().inv_cdf((1 + level) / 2) * np.sqrt(p * (1 - p) / self.n)
+        return self.edges, p, np.maximum(p - half, 0), np.minimum(p + half, 1)
+
+    def plot(self, title=None, level=0.95, xscale=None, yscale=None, savefig=None, figsize=(4, 4)):
+        """ Display the histogram with its confidence intervals
+        title: The title of the figure
+        level: Confidence level of the error bars
+        xscale / yscale: If 'log' then log-scale that axis
+        savefig: Name of .png file to save plot
+        figsize: Default figure size """
+        edges, p, low, high = self.histogram(level)
+        centers = (edges[:-1] + edges[1:]) / 2
+        plt.figure(figsize=figsize)
+        plt.stairs(p, edges, fill=True, color="blue", label=f"Sampled PMF (n={self.n})")
+        plt.errorbar(centers, p, yerr=(p - low, high - p), fmt='none', color="black", linewidth=0.5,
+                     label=f"{int(level * 100)}% CI")
+        if xscale:
+            plt.xscale('log')
+        if yscale:
+            plt.yscale('log')
+        plt.xlabel("Value")
+        plt.ylabel("Probability")
+        plt.title(title)
+        plt.legend()
+        plt.grid(True)
+        if savefig:
+            plt.savefig(savefig)
+        plt.show()
+
+    def __repr__(self):
+        low, high = self.ci()
+        return f"MonteCarloResult(n={self.n}, mean={self.mean:.6g}, 95% CI=({low:.6g}, {high:.6g}), std={self.std:.6g})"
+
+
+def histogram_edges(expression, bins=1000, scale=None):
+    """ Edges spanning every value the expression can take (from its bounds),
+    equally spaced or, with scale='log', log-spaced. On a log scale, an expression
+    that can be zero or negative gets a first bin for those values, and the log-spaced
+    bins start at its smallest positive value """
+    low, high = expression.bounds()
+    if scale == 'log':
+        if low > 0:
+            return np.geomspace(low, high, bins + 1)
+        floor = expression.positive_floor()
+        if floor is None or high <= 0:
+            raise ValueError("Log-spaced bins need an expression with a positive lower bound on its "
+                             "positive values (a sum or product of non-negative DRVs)")
+        # the slight margin keeps positive values that round just below the floor out of the first bin
+        return np.concatenate(([low], np.geomspace(floor * (1 - 1e-9), high, bins)))
+    if low == high:
+        high = low + 1.0
+    return np.linspace(low, high, bins + 1)
+
+
+def _init_worker(expression, edges):
+    _WORKER['expression'] = expression
+    _WORKER['edges'] = edges
+
+
+def _run_chunk(job):
+    """ Accumulate one chunk of samples; job is (size, seed sequence) """
+    size, seed = job
+    result = MonteCarloResult(_WORKER['edges'])
+    result.add(_WORKER['expression'].sample(size, np.random.default_rng(seed)))
+    return result
+
+
+def simulate(expression, samples=10**6, chunk_size=10**6, seed=None, processes=1, bins=1000, scale=None):
+    """ Monte Carlo estimate of a DRV or DRV expression
+    samples: total number of samples
+    chunk_size: samples drawn and evaluated at a time (bounds memory)
+    seed: seed for the SeedSequence the chunk seeds are spawned from
+    processes: number of worker processes (1 runs in this process)
+    bins / scale: histogram bins and spacing (None or 'log'; see histogram_edges)
+    Returns a MonteCarloResult """
+    edges = histogram_edges(expression, bins, scale)
+    sizes = [chunk_size] * (samples // chunk_size) + ([samples % chunk_size] if samples % chunk_size else [])
+    jobs = list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+    result = MonteCarloResult(edges)
+    if processes == 1:
+        _init_worker(expression, edges)
+        for job in jobs:
+            result.merge(_run_chunk(job))
+    else:
+        with mp.Pool(processes, initializer=_init_worker, initargs=(expression, edges)) as pool:
+            for chunk in pool.imap(_run_chunk, jobs):
+                result.merge(chunk)
+    return result
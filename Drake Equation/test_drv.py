@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from drv_START import DRV, DRVExpression
+
+
+def drake_terms(**policy):
+    # the factors of the Drake equation as set up in drake.py
+    return [DRV(type='uniform', min=1.5, max=3.0, bins=10, **policy),
+            DRV(values=[0.8, 0.9, 1], probabilities=[0.25, 0.25, 0.5]),
+            DRV(type='normal', mean=3.0, stdev=1.0, bins=8),
+            DRV(type='normal', mean=(1 / 30), stdev=(1 / 90)),
+            DRV(type='normal', mean=0.04, stdev=0.01),
+            DRV(type='normal', mean=0.01, stdev=0.003),
+            DRV(values=[1000000] + [100000000 * i for i in range(1, 11)],
+                probabilities=[0.05] + [0.1] * 9 + [0.05])]
+
+
+def drake(**policy):
+    N = 1
+    for term in drake_terms(**policy):
+        N = N * term
+    return N
+
+
+DRAKE_E = 41629.1625
+
+
+def test_dist_and_add():
+    # dist= builds the same DRV as values / probabilities, and sums work across the outer product
+    X = DRV(dist={1: 0.5, 2: 0.5})
+    Y = DRV(values=[0, 10], probabilities=[0.25, 0.75])
+    assert X.dist == {1.0: 0.5, 2.0: 0.5}
+    assert (X + Y).dist == {1.0: 0.125, 2.0: 0.125, 11.0: 0.375, 12.0: 0.375}
+    assert (X + X).dist == {2.0: 0.25, 3.0: 0.5, 4.0: 0.25}
+    assert (X - Y).dist == {-9.0: 0.375, -8.0: 0.375, 1.0: 0.125, 2.0: 0.125}
+    assert (10 - X).dist == {8.0: 0.5, 9.0: 0.5}
+    assert (2 * X + 1).dist == {3.0: 0.5, 5.0: 0.5}
+
+
+@pytest.mark.parametrize("method", ["quantile", "log", "width"])
+def test_rebin_keeps_mean_and_mass(method):
+    exact = drake().compute()
+    bounded = drake(max_support=300, rebin_method=method).compute()
+    assert len(bounded.values) <= 300 and (np.diff(bounded.values) > 0).all()
+    assert bounded.E() == pytest.approx(exact.E(), rel=1e-12)
+    assert bounded.probabilities.sum() == pytest.approx(1.0)
+
+    rebinned = exact.rebin(50, method)
+    assert len(rebinned.values) <= 50
+    assert rebinned.E() == pytest.approx(DRAKE_E, rel=1e-12)
+    assert rebinned.probabilities.sum() == pytest.approx(1.0)
+
+
+def test_expression_expectation():
+    # E() of an expression comes from its terms' expectations, without computing it
+    N = drake()
+    assert isinstance(N, DRVExpression) and len(N.terms) == 7
+    assert N.E() == pytest.approx(DRAKE_E, rel=1e-12)
+    assert N.E() == pytest.approx(N.compute().E(), rel=1e-12)
+
+    X = DRV(values=[1, 2, 3], probabilities=[0.2, 0.3, 0.5])
+    Y = DRV(values=[0, 5], probabilities=[0.5, 0.5])
+    for expression in (3 * X * Y * 2, 10 - 2 * X + 3 * Y - 1, (X + Y) * (X - Y)):
+        assert expression.E() == pytest.approx(expression.compute().E(), rel=1e-12)
+
+
+def test_log_product_matches_linear():
+    # the log-domain product gives the linear result, zero values included
+    X = DRV(values=[0, 1, 2], probabilities=[0.2, 0.3, 0.5])
+    Y = DRV(values=[0.5, 4], probabilities=[0.5, 0.5])
+    Z = DRV(values=[0, 3], probabilities=[0.1, 0.9])
+    linear = (2 * X * Y * Z).compute()
+    logged = (2 * DRV(dist=X.dist, log_grid=1e-12) * Y * Z).compute()
+    assert np.allclose(logged.values, linear.values) and np.allclose(logged.probabilities, linear.probabilities)
+    assert logged.values[0] == 0 and logged.probabilities[0] == pytest.approx(1 - 0.8 * 0.9)
+
+    exact = drake().compute()
+    for grid in (1e-9, 1e-2):
+        N = drake(log_grid=grid).compute()
+        assert N.E() == pytest.approx(DRAKE_E, rel=1e-12)
+        assert N.probabilities[0] == pytest.approx(exact.probabilities[0])
+        assert N.probabilities.sum() == pytest.approx(1.0)
+
+
+def test_simulate_seed_stable():
+    # chunks have their own seeds, so the result does not depend on the process count
+    N = drake()
+    single = N.simulate(40000, chunk_size=10000, seed=3)
+    pooled = N.simulate(40000, chunk_size=10000, seed=3, processes=2)
+    assert single.n == pooled.n == 40000
+    assert single.mean == pooled.mean and (single.counts == pooled.counts).all()
+    assert single.var == pytest.approx(pooled.var)
+    low, high = single.ci(0.999)
+    assert low < DRAKE_E < high
+
+
+def test_simulate_log_scale():
+    # N can be zero, so on a log scale the zeros get a first bin of their own
+    N = drake()
+    result = N.simulate(100000, seed=1, bins=100, scale='log')
+    assert len(result.counts) == 100 and result.edges[0] == 0 and result.edges[1] > 0
+    assert result.counts.sum() == result.n
+    assert result.counts[0] / result.n == pytest.approx(N.compute().probabilities[0], abs=0.002)
+    with pytest.raises(ValueError):
+        (DRV(values=[-1, 2], probabilities=[0.5, 0.5]) * N).simulate(1000, scale='log')
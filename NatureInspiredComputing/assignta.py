@@ -1,40 +1,42 @@
 import pandas as pd
 import numpy as np
 import evo
+from stopping import HypervolumeStagnation
+from scheduler import AdaptiveScheduler
+from reporter import FrontReporter
+from generate import generate_problem
 import copy
+from functools import partial
 import random as rnd
+import os
 
 def conflicts(solution,lab_times):
     '''
-    :param lab_times: Schedule time for each lab
+    :param lab_times: Schedule time for each lab, or an AssignTAProblem
     :return: the number of lab assignments for TAs that conflict.
     '''
+    if isinstance(lab_times, AssignTAProblem):
+        # count labs per TA per time slot; any slot above one is a conflict
+        slot_counts = slot_loads(solution, lab_times.lab_times, lab_times.slots.shape[1])
+        return int((slot_counts > 1).any(axis=1).sum())
 
-    # Find the indices where the solution matrix has a 1 (indicating an assignment).
-    lab_asgn = np.where(solution == 1)
-
-    # use these indices to find the lab times for TAs when the TA has an assignment
-    assigned_times = lab_times[lab_asgn[1]]
-
-    # create a list for each TA
-    assigned_times_by_ta = np.split(assigned_times, np.unique(lab_asgn[0], return_index=True)[1][1:])
-
-    # iterate through each TA and check if their have overlapping assignments.
-    conflict_counter = 0
-    for times in assigned_times_by_ta:
-        # If there are duplicates, there's a conflict
-        if len(np.unique(times)) < len(times):
-            conflict_counter += 1
+    # number the distinct lab times, then count each TA's assignments (1s) per time
+    codes, _ = pd.factorize(np.asarray(lab_times))
+    slot_counts = slot_loads(solution == 1, codes, codes.max() + 1)
 
-    return conflict_counter
+    # a TA with two labs at the same time has a conflict
+    return int((slot_counts > 1).any(axis=1).sum())
 
 
 def overallocation(solution, max_assigned):
     '''
     :param solution: array of solution assignments
-    :param max_assigned: max assigned classes for each Ta
+    :param max_assigned: max assigned classes for each Ta, or an AssignTAProblem
     :return: the sum of the differences between assigned labs and max labs where max labs are smaller than assigned.
     '''
+    if isinstance(max_assigned, AssignTAProblem):
+        return int(np.maximum(solution.sum(axis=1, dtype=np.int64) - max_assigned.max_assigned, 0).sum())
+
     overallocation_penalty = 0
     # Loop through rows
     for i in range(solution.shape[0]):
@@ -49,9 +51,12 @@ def undersupport(solution, min_ta):
     '''
 
     :param solution: array of solution assignments
-    :param min_ta:
-    :return:
+    :param min_ta: min TAs for each lab, or an AssignTAProblem
+    :return: the total number of TAs missing across all labs
     '''
+    if isinstance(min_ta, AssignTAProblem):
+        min_ta = min_ta.min_ta
+
     # calculate the number of TAs assigned in each Office Hour.
     num_tas = solution.sum(axis = 0)
 
@@ -61,7 +66,10 @@ def undersupport(solution, min_ta):
 
 def unavailable(solution,availabilities):
     # Create boolean values where 'U' (Unavailable) entries are marked as True.
-    unavailabilities = (availabilities == 'U')
+    if isinstance(availabilities, AssignTAProblem):
+        unavailabilities = availabilities.unavailable_mask
+    else:
+        unavailabilities = (availabilities == 'U')
 
     # Count the number of TA assignments that fall into unavailable slots.
     unavailable_count = np.sum(solution[unavailabilities])
@@ -69,14 +77,264 @@ def unavailable(solution,availabilities):
 
 def unpreferred(solution,availabilities):
     # Create boolean values where 'W' unpreferred entries are marked as True.
-    unpreffered = (availabilities == 'W')
+    if isinstance(availabilities, AssignTAProblem):
+        unpreffered = availabilities.unpreferred_mask
+    else:
+        unpreffered = (availabilities == 'W')
 
     # use these boolean values to count the number of times TAs are assigned to unpreferred slots
     unpreffered_count = np.sum(solution[unpreffered])
     return unpreffered_count
 
 
-def one_mutation(solutions):
+# objective names in the column order returned by batch_objectives
+OBJECTIVES = ("Overallocation", "Conflicts", "Undersupport", "Unavailable", "Unpreferred")
+
+
+def time_slot_matrix(lab_times):
+    '''
+    :param lab_times: Schedule time for each lab
+    :return: a (sections x time slots) one-hot matrix marking the time slot of each lab.
+    '''
+    # number the distinct lab times 0..k-1 and one-hot encode them
+    codes, _ = pd.factorize(np.asarray(lab_times))
+    slots = np.zeros((len(codes), codes.max() + 1), dtype=np.int32)
+    slots[np.arange(len(codes)), codes] = 1
+    return slots
+
+
+def slot_loads(solutions, lab_times, n_slots):
+    '''
+    Labs per TA per time slot, counted from the assigned cells only, so the cost
+    grows with the size of the solutions rather than with a (sections x slots) product.
+    :param solutions: 0/1 array of solution assignments with shape (..., tas, sections)
+    :param lab_times: integer time slot code of each lab
+    :param n_slots: number of distinct time slots
+    :return: an int array of shape (..., tas, n_slots)
+    '''
+    solutions = np.asarray(solutions)
+    rows, cols = np.nonzero(solutions.reshape(-1, solutions.shape[-1]))
+    counts = np.bincount(rows * n_slots + lab_times[cols],
+                         minlength=solutions.size // solutions.shape[-1] * n_slots)
+    return counts.reshape(solutions.shape[:-1] + (n_slots,))
+
+
+def batch_objectives(solutions, slots, max_assigned, min_ta, unavailable_mask, unpreferred_mask):
+    '''
+    Score a whole stack of solutions for all five objectives in one pass of NumPy.
+    :param solutions: array of solution assignments with shape (N, tas, sections)
+    :param slots: one-hot time slot matrix from time_slot_matrix
+    :param max_assigned: int array of max assigned labs for each TA
+    :param min_ta: int array of min TAs for each lab
+    :param unavailable_mask: boolean (tas x sections) array of 'U' slots
+    :param unpreferred_mask: boolean (tas x sections) array of 'W' slots
+    :return: an (N x 5) int array of scores, columns ordered as OBJECTIVES
+    '''
+    solutions = np.asarray(solutions)
+
+    # labs per TA, and the amount each TA goes over their max
+    loads = solutions.sum(axis=2, dtype=np.int64)
+    overallocation_scores = np.maximum(loads - max_assigned, 0).sum(axis=1)
+
+    # labs per TA per time slot; a TA with two labs in the same slot has a conflict
+    slot_counts = slot_loads(solutions, slots.argmax(axis=1), slots.shape[1])
+    conflict_scores = (slot_counts > 1).any(axis=2).sum(axis=1)
+
+    # TAs per lab, and the amount each lab falls short of its minimum
+    coverage = solutions.sum(axis=1, dtype=np.int64)
+    undersupport_scores = np.maximum(min_ta - coverage, 0).sum(axis=1)
+
+    # assignments landing on unavailable / unpreferred slots
+    unavailable_scores = (solutions * unavailable_mask).sum(axis=(1, 2), dtype=np.int64)
+    unpreferred_scores = (solutions * unpreferred_mask).sum(axis=(1, 2), dtype=np.int64)
+
+    return np.column_stack((overallocation_scores, conflict_scores, undersupport_scores,
+                            unavailable_scores, unpreferred_scores))
+
+
+def pack(solutions):
+    '''
+    :param solutions: 0/1 solution matrix or stack of matrices
+    :return: the solutions bit-packed along each TA row, 8 sections per byte
+    '''
+    return np.packbits(solutions, axis=-1)
+
+
+def unpack(packed, sections):
+    '''
+    :param packed: bit-packed solutions from pack
+    :param sections: number of sections (columns) in the unpacked solution
+    :return: the 0/1 solutions as uint8
+    '''
+    return np.unpackbits(packed, axis=-1, count=sections)
+
+
+# number of set bits in each byte value, for NumPy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(packed):
+    '''
+    :param packed: uint8 array
+    :return: the number of set bits in each byte
+    '''
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(packed)
+    return _POPCOUNT[packed]
+
+
+class AssignTAProblem:
+    """ A TA assignment problem compiled once into plain NumPy arrays.
+    Pass it in place of the pandas arguments to any objective function. """
+
+    def __init__(self, sections_df, tas_df):
+        """ sections_df / tas_df: frames in the sections.csv / tas.csv layout """
+        # lab time slots as integer codes plus a one-hot (sections x slots) matrix
+        self.lab_times = pd.factorize(sections_df['daytime'])[0]
+        self.slots = time_slot_matrix(sections_df['daytime'])
+
+        # per-TA and per-lab limits as int arrays
+        self.max_assigned = tas_df['max_assigned'].to_numpy(dtype=np.int64)
+        self.min_ta = sections_df['min_ta'].to_numpy(dtype=np.int64)
+
+        # availability preferences and the masks used by unavailable / unpreferred
+        self.availabilities = tas_df.drop(columns=['ta_id', 'name', 'max_assigned']).to_numpy()
+        self.unavailable_mask = self.availabilities == 'U'
+        self.unpreferred_mask = self.availabilities == 'W'
+
+        # (TAs, sections) shape of a solution
+        self.shape = self.availabilities.shape
+
+        # bit-packed masks for scoring packed solutions: U/W slots per TA
+        self.unavailable_bits = pack(self.unavailable_mask)
+        self.unpreferred_bits = pack(self.unpreferred_mask)
+
+    @classmethod
+    def from_csv(cls, sections="assignta_data/sections.csv", tas="assignta_data/tas.csv"):
+        """ Load the problem from the sections and TAs csv files """
+        return cls(pd.read_csv(sections), pd.read_csv(tas))
+
+    @classmethod
+    def synthetic(cls, tas=40, sections=17, conflict_density=None, seed=0):
+        """ A random problem of the given size (see generate.generate_problem) """
+        return cls(*generate_problem(tas, sections, conflict_density, seed))
+
+    def evaluate(self, solutions):
+        """ Score a stack of solutions for all objectives (see batch_objectives) """
+        return batch_objectives(solutions, self.slots, self.max_assigned, self.min_ta,
+                                self.unavailable_mask, self.unpreferred_mask)
+
+    def evaluate_packed(self, packed):
+        """ Score a stack of bit-packed solutions (see pack) for all objectives with
+        popcounts and bitwise ANDs against the packed masks.
+        Evo never calls this itself: bits=True populations hand objectives unpacked
+        solutions, so call it directly on stacks you keep packed. """
+        packed = np.asarray(packed)
+
+        # labs per TA, and the amount each TA goes over their max
+        loads = popcount(packed).sum(axis=-1, dtype=np.int64)
+        overallocation_scores = np.maximum(loads - self.max_assigned, 0).sum(axis=1)
+
+        # lab times and TAs per lab need the columns, so unpack once for both
+        unpacked = unpack(packed, self.shape[1])
+        slot_counts = slot_loads(unpacked, self.lab_times, self.slots.shape[1])
+        conflict_scores = (slot_counts > 1).any(axis=2).sum(axis=1)
+        coverage = unpacked.sum(axis=1, dtype=np.int64)
+        undersupport_scores = np.maximum(self.min_ta - coverage, 0).sum(axis=1)
+
+        # assignments landing on unavailable / unpreferred slots
+        unavailable_scores = popcount(packed & self.unavailable_bits).sum(axis=(1, 2), dtype=np.int64)
+        unpreferred_scores = popcount(packed & self.unpreferred_bits).sum(axis=(1, 2), dtype=np.int64)
+
+        return np.column_stack((overallocation_scores, conflict_scores, undersupport_scores,
+                                unavailable_scores, unpreferred_scores))
+
+    def stats(self, solution):
+        """ Build the cached row/column statistics of one solution (see AssignmentStats) """
+        return AssignmentStats(self, solution)
+
+    def delta(self, stats, solution, cells):
+        """ Rescore a solution that differs from the one behind stats only at cells.
+        cells: (row, col) pairs that were flipped; solution holds their new values """
+        new_stats = stats.copy()
+        for row, col in cells:
+            new_stats.flip(row, col, solution[row, col])
+        return new_stats
+
+
+class AssignmentStats:
+    """ Per-row and per-column sums of one solution (TA load, lab coverage and
+    per-TA time slot counts) plus the five objective totals derived from them.
+    flip() updates everything in O(1) when a single cell changes. """
+
+    def __init__(self, problem, solution):
+        self.problem = problem
+
+        # labs per TA, TAs per lab and labs per TA per time slot
+        self.loads = solution.sum(axis=1, dtype=np.int64)
+        self.coverage = solution.sum(axis=0, dtype=np.int64)
+        self.slot_counts = slot_loads(solution, problem.lab_times, problem.slots.shape[1])
+
+        # number of time slots per TA holding two or more labs
+        self.over_slots = (self.slot_counts > 1).sum(axis=1)
+
+        # running objective totals
+        self.overallocation = int(np.maximum(self.loads - problem.max_assigned, 0).sum())
+        self.conflicts = int((self.over_slots > 0).sum())
+        self.undersupport = int(np.maximum(problem.min_ta - self.coverage, 0).sum())
+        self.unavailable = int(solution[problem.unavailable_mask].sum())
+        self.unpreferred = int(solution[problem.unpreferred_mask].sum())
+
+    @property
+    def scores(self):
+        """ Objective totals, ordered as OBJECTIVES """
+        return (self.overallocation, self.conflicts, self.undersupport,
+                self.unavailable, self.unpreferred)
+
+    def copy(self):
+        """ Copy the statistics so a child can update them without touching the parent """
+        new = copy.copy(self)
+        new.loads = self.loads.copy()
+        new.coverage = self.coverage.copy()
+        new.slot_counts = self.slot_counts.copy()
+        new.over_slots = self.over_slots.copy()
+        return new
+
+    def flip(self, row, col, value):
+        """ Update the statistics after cell (row, col) changed to value (0 or 1) """
+        problem = self.problem
+        d = 1 if value else -1
+
+        # TA load and how far it is over the max
+        old = int(self.loads[row])
+        self.loads[row] = old + d
+        limit = problem.max_assigned[row]
+        self.overallocation += max(old + d - limit, 0) - max(old - limit, 0)
+
+        # lab coverage and how far it is under the min
+        old = int(self.coverage[col])
+        self.coverage[col] = old + d
+        limit = problem.min_ta[col]
+        self.undersupport += max(limit - old - d, 0) - max(limit - old, 0)
+
+        # labs in this time slot for the TA; a TA conflicts while any slot holds 2+
+        slot = problem.lab_times[col]
+        old = int(self.slot_counts[row, slot])
+        self.slot_counts[row, slot] = old + d
+        was_conflicted = self.over_slots[row] > 0
+        self.over_slots[row] += (old + d > 1) - (old > 1)
+        self.conflicts += int(self.over_slots[row] > 0) - int(was_conflicted)
+
+        # assignments on unavailable / unpreferred slots
+        self.unavailable += d * int(problem.unavailable_mask[row, col])
+        self.unpreferred += d * int(problem.unpreferred_mask[row, col])
+
+
+# agents draw from the Generator Evo passes as rng; this one serves direct calls
+_RNG = np.random.default_rng()
+
+
+def one_mutation(solutions, rng=_RNG):
     # create a function that randomly changes one value from the solution
 
     # Choose one solution from the list
@@ -86,8 +344,8 @@ def one_mutation(solutions):
     rows, cols = solution.shape
 
     # Randomly choose one position (row, col) to flip
-    row_idx = np.random.randint(0, rows)
-    col_idx = np.random.randint(0, cols)
+    row_idx = rng.integers(0, rows)
+    col_idx = rng.integers(0, cols)
 
     # Flip the binary value (0 or 1) at that position
     solution[row_idx, col_idx] = 1 - solution[row_idx, col_idx]
@@ -95,7 +353,7 @@ def one_mutation(solutions):
     return solution
 
 
-def crossover_columns(solutions):
+def crossover_columns(solutions, rng=_RNG):
     # create a function that takes 2 solutions and merges/stacks the solutions on a random column.
     # Choose two solutions randomly from the pool
     sol1, sol2 = solutions
@@ -104,14 +362,14 @@ def crossover_columns(solutions):
     rows, cols = sol1.shape
 
     # Randomly choose a crossover point
-    crossover_point = np.random.randint(1, cols)
+    crossover_point = rng.integers(1, cols)
 
     # Perform the stack/merge
     answer = np.hstack((sol1[:, :crossover_point], sol2[:, crossover_point:]))
     return answer
 
 
-def crossover_rows(solutions):
+def crossover_rows(solutions, rng=_RNG):
     # create a function that takes 2 solutions and merges/stacks the solutions on a random row.
     # Choose two solutions randomly from the pool
     sol1, sol2 = solutions
@@ -120,14 +378,14 @@ def crossover_rows(solutions):
     rows, cols = sol1.shape
 
     # Randomly choose a crossover point
-    crossover_point = np.random.randint(1, rows)
+    crossover_point = rng.integers(1, rows)
 
     # Perform the merge/stack
     answer = np.vstack((sol1[:crossover_point, :], sol2[crossover_point:, :]))
 
     return answer
 
-def randomize(solutions):
+def randomize(solutions, rng=_RNG):
     # create a function that reshuffles 10% of a solution
     # Choose one solution randomly from the pool
     solution = solutions[0]
@@ -136,54 +394,160 @@ def randomize(solutions):
     rows, cols = solution.shape
 
     # Randomly choose a portion of the solution to randomize (you could randomize a percentage of the solution)
-    num_changes = np.random.randint(1, rows * cols // 10)  # Randomize up to 10% of the solution
+    num_changes = rng.integers(1, rows * cols // 10)  # Randomize up to 10% of the solution
 
     # Randomly select positions to change
-    for _ in range(num_changes):
-        row = np.random.randint(0, rows)
-        col = np.random.randint(0, cols)
+    row = rng.integers(0, rows, size=num_changes)
+    col = rng.integers(0, cols, size=num_changes)
 
-        # Flip the value at the selected position (0 becomes 1 and 1 becomes 0)
-        solution[row, col] = 1 - solution[row, col]
+    # Flip the value at the selected positions (0 becomes 1 and 1 becomes 0);
+    # a position picked twice flips back, as it would one flip at a time
+    flips = np.bincount(row * cols + col, minlength=rows * cols).reshape(rows, cols) % 2 == 1
+    solution[flips] = 1 - solution[flips]
 
     return solution
 
-def main():
-    # import the dfs.
-    sections_df = pd.read_csv("assignta_data/sections.csv")
-    tas_df = pd.read_csv("assignta_data/tas.csv")
+def batch_one_mutation(parents, rng=_RNG):
+    # flip one random cell in each child of the batch
+    # parents has shape (1, B, rows, cols)
+    solutions = parents[0]
+    batch, rows, cols = solutions.shape
+
+    # one (row, col) position per child
+    row_idx = rng.integers(0, rows, size=batch)
+    col_idx = rng.integers(0, cols, size=batch)
+    solutions[np.arange(batch), row_idx, col_idx] ^= 1
+
+    return solutions
+
+
+def batch_randomize(parents, rng=_RNG):
+    # flip a random mask of cells in each child, up to 10% of the solution like randomize
+    solutions = parents[0]
+    batch, rows, cols = solutions.shape
+
+    # each child gets its own flip rate, then a bit-flip mask drawn at that rate
+    rates = rng.uniform(0, 0.1, size=(batch, 1, 1))
+    mask = rng.random(solutions.shape) < rates
+    solutions ^= mask.astype(solutions.dtype)
+
+    return solutions
+
 
-    # initialize the class framework.
-    E = evo.Evo()
+def batch_crossover_rows(parents, rng=_RNG):
+    # take rows above a random crossover point from the first parent and the rest from the second
+    # parents has shape (2, B, rows, cols)
+    sol1, sol2 = parents
+    batch, rows, cols = sol1.shape
 
-    # create/define the 2nd argument for each objective function.
-    lab_times = sections_df['daytime']
-    max_assigned = tas_df['max_assigned']
-    min_ta = sections_df['min_ta']
-    availability_matrix = tas_df.drop(columns=['ta_id', 'name', 'max_assigned']).to_numpy()
+    # one crossover point per child, expanded into a row mask
+    crossover_points = rng.integers(1, rows, size=(batch, 1))
+    from_first = np.arange(rows) < crossover_points
 
+    return np.where(from_first[:, :, None], sol1, sol2)
 
-    # Register the created objectives
-    E.add_objective("Overallocation", lambda sol: overallocation(sol, max_assigned))
-    E.add_objective("Conflicts", lambda sol: conflicts(sol, lab_times))
-    E.add_objective("Undersupport", lambda sol: undersupport(sol, min_ta))
-    E.add_objective("Unavailable", lambda sol: unavailable(sol, availability_matrix))
-    E.add_objective("Unpreferred", lambda sol: unpreferred(sol, availability_matrix))
 
-    # initialize 10 random starting solutions.
-    for _ in range(10):  # Start with 10 random solutions
-        sol = np.random.randint(2, size=(40, 17))  # Random TA assignment
-        E.add_solution(sol)
+def batch_crossover_columns(parents, rng=_RNG):
+    # take columns left of a random crossover point from the first parent and the rest from the second
+    sol1, sol2 = parents
+    batch, rows, cols = sol1.shape
+
+    # one crossover point per child, expanded into a column mask
+    crossover_points = rng.integers(1, cols, size=(batch, 1))
+    from_first = np.arange(cols) < crossover_points
+
+    return np.where(from_first[:, None, :], sol1, sol2)
+
+def _receivers(solution, problem, section):
+    # TAs who could take a section: available, under their max and free at its time
+    slot = problem.lab_times[section]
+    same_time = problem.lab_times == slot
+    return np.flatnonzero(~problem.unavailable_mask[:, section]
+                          & (solution.sum(axis=1) < problem.max_assigned)
+                          & (solution[:, same_time].sum(axis=1) == 0))
+
+
+def _reassign(solution, problem, row, col, rng):
+    # take a lab away from a TA and give it to a random TA who can take it, if there is one
+    solution[row, col] = 0
+    receivers = _receivers(solution, problem, col)
+    receivers = receivers[receivers != row]
+    if len(receivers) > 0:
+        solution[receivers[rng.integers(0, len(receivers))], col] = 1
+    return solution
+
+
+def repair_unavailable(solutions, problem, rng=_RNG):
+    # swap a TA out of a section they are unavailable for, handing it to a TA who can take it
+    solution = solutions[0]
+    rows, cols = np.nonzero((solution == 1) & problem.unavailable_mask)
+    if len(rows) == 0:
+        return solution
+    pick = rng.integers(0, len(rows))
+    return _reassign(solution, problem, rows[pick], cols[pick], rng)
+
+
+def repair_conflict(solutions, problem, rng=_RNG):
+    # move one of the labs a TA holds at the same time to a TA who is free then
+    solution = solutions[0]
+    slot_counts = slot_loads(solution, problem.lab_times, problem.slots.shape[1])
+    rows, slots = np.nonzero(slot_counts > 1)
+    if len(rows) == 0:
+        return solution
+    pick = rng.integers(0, len(rows))
+    row = rows[pick]
+    labs = np.flatnonzero((solution[row] == 1) & (problem.lab_times == slots[pick]))
+    return _reassign(solution, problem, row, labs[rng.integers(0, len(labs))], rng)
+
+
+def main(checkpoint="ArjunS_checkpoint.npz", data="assignta_data", seed=None):
+    # load the sections and TAs once into plain arrays; the solution shape follows the problem.
+    problem = AssignTAProblem.from_csv(os.path.join(data, "sections.csv"), os.path.join(data, "tas.csv"))
+
+    # initialize the class framework, storing the 0/1 solutions bit-packed and
+    # running the agents that produce the most new non-dominated solutions per second more often.
+    # A seed makes the whole run repeatable, so agents are then rated per call rather than per second.
+    E = evo.Evo(bits=True, scheduler=AdaptiveScheduler(timed=seed is None), seed=seed)
+
+    # Register all five objectives with cached statistics so small mutations are rescored incrementally
+    E.add_delta_objective(OBJECTIVES, problem.stats, problem.delta)
+
+    # pick up a killed run from its last checkpoint (a finished run removes it),
+    # or start fresh with 10 random starting solutions and a new front stream.
+    fronts = "ArjunS_fronts.jsonl"
+    resumed = os.path.exists(checkpoint)
+    if resumed:
+        E.resume(checkpoint)
+    else:
+        if os.path.exists(fronts):
+            os.remove(fronts)
+        for _ in range(10):  # Start with 10 random solutions
+            sol = E.rng.integers(2, size=problem.shape)  # Random TA assignment
+            E.add_solution(sol)
 
     # add the agents I created
     E.add_agent("one_mutation", one_mutation, k=1)
-    E.add_agent("crossover_rows", crossover_rows, k=2)
+    E.add_agent("crossover_rows", crossover_rows, k=2, mutates=False)
     E.add_agent("randomize", randomize, k=1)
-    E.add_agent('crossover_columns', crossover_columns, k=2)
-    E.evolve(n=200000, dom=100, status=50000)
+    E.add_agent('crossover_columns', crossover_columns, k=2, mutates=False)
+
+    # repair agents only make moves that respect availability, capacity and lab times
+    E.add_agent("repair_unavailable", partial(repair_unavailable, problem=problem), k=1)
+    E.add_agent("repair_conflict", partial(repair_conflict, problem=problem), k=1)
+    # stop early once the front's hypervolume has stalled for 20,000 iterations, streaming
+    # front changes to ArjunS_fronts.jsonl (the full solutions go to the summary files below)
+    E.evolve(n=200000 - E.iteration, dom=100, status=50000, stop=[HypervolumeStagnation(window=200, tol=1e-4)],
+             checkpoint=checkpoint, checkpoint_every=10000, reporter=FrontReporter(fronts, resume=resumed))
+
+    # the run finished (or stopped early on purpose), so the next one starts fresh
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
 
     summary_df = E.summarize()
     summary_df.to_csv("ArjunS_summary.csv", index=False)
 
+    # the same front in the compact bit-packed format (read back with evo.load_front)
+    E.save_front("ArjunS_summary.npz")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
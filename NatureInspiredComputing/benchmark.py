@@ -0,0 +1,166 @@
+"""
+File: benchmark.py
+Description: Repeatable benchmarks for the evo / assignta pipeline.
+            Measures objective throughput (single and batch calls),
+            remove_dominated scaling with population size, conflicts
+            scaling with problem size and end-to-end
+            evolve throughput, and prints the results as JSON so runs can
+            be compared across commits.
+
+            python benchmark.py --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+import evo
+from assignta import AssignTAProblem, OBJECTIVES, pack
+from assignta import overallocation, conflicts, undersupport, unavailable, unpreferred
+from assignta import one_mutation, crossover_rows, crossover_columns, randomize
+from sparse_assignment import SparseAssignment, sparse_objectives
+
+
+def best_time(f, repeat=5, number=1):
+    """ Best wall time of `repeat` runs of `number` calls to f, per call """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            f()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def problems(data="assignta_data"):
+    """ The problems to benchmark: the real data (if present) and a synthetic 400 TA x 170 section one """
+    found = {}
+    if os.path.exists(os.path.join(data, "sections.csv")) and os.path.exists(os.path.join(data, "tas.csv")):
+        found['assignta_data'] = AssignTAProblem.from_csv(os.path.join(data, "sections.csv"),
+                                                          os.path.join(data, "tas.csv"))
+    found['synthetic_400x170'] = AssignTAProblem.synthetic(tas=400, sections=170, seed=0)
+    return found
+
+
+def objective_throughput(problem, batch=256, seed=0):
+    """ Solutions scored per second by each way of evaluating the objectives """
+    rng = np.random.default_rng(seed)
+    solutions = rng.integers(2, size=(batch,) + problem.shape, dtype=np.uint8)
+    packed = pack(solutions)
+    sol = solutions[0]
+    stats = problem.stats(sol)
+    cell = np.array([[0, 0]])
+    flipped = sol.copy()
+    flipped[0, 0] ^= 1
+
+    single = {name: f for name, f in zip(OBJECTIVES, (overallocation, conflicts, undersupport,
+                                                      unavailable, unpreferred))}
+    results = {f"single_{name.lower()}": 1 / best_time(lambda f=f: f(sol, problem), number=100)
+               for name, f in single.items()}
+    results['single_stats'] = 1 / best_time(lambda: problem.stats(sol), number=100)
+    results['single_delta'] = 1 / best_time(lambda: problem.delta(stats, flipped, cell), number=100)
+    results['batch_evaluate'] = batch / best_time(lambda: problem.evaluate(solutions))
+    results['batch_evaluate_packed'] = batch / best_time(lambda: problem.evaluate_packed(packed))
+
+    # a realistic schedule (about two labs per TA) scored dense and in CSR form
+    sparse = SparseAssignment.random(problem.shape, 2 * problem.shape[0], rng=rng)
+    dense = sparse.to_dense()
+    results['sparse_schedule_stats'] = 1 / best_time(lambda: problem.stats(dense), number=20)
+    results['sparse_schedule_csr'] = 1 / best_time(lambda: sparse_objectives([sparse], problem), number=20)
+    return results
+
+
+def dominance_scaling(sizes=(100, 1000, 10000, 50000), objectives=5, seed=0):
+    """ Seconds for one remove_dominated pass over random integer scores """
+    rng = np.random.default_rng(seed)
+    results = {}
+    for size in sizes:
+        scores = rng.integers(100, size=(size, objectives))
+        solutions = np.arange(size).reshape(size, 1)
+
+        def run():
+            E = evo.Evo(memo_size=0)
+            E.pop.names = tuple(f"f{j}" for j in range(objectives))
+            E.pop.add_many(solutions, scores)
+            E.remove_dominated()
+
+        results[str(size)] = best_time(run, repeat=3)
+    return results
+
+
+def conflicts_scaling(sizes=((100, 40), (200, 85), (400, 170), (800, 340), (1600, 680)),
+                      fill=0.02, seed=0):
+    """ Seconds per conflicts call as the problem grows; the per-cell cost should stay flat """
+    rng = np.random.default_rng(seed)
+    results = {}
+    for tas, sections in sizes:
+        problem = AssignTAProblem.synthetic(tas=tas, sections=sections, conflict_density=0.02, seed=seed)
+        sol = (rng.random(problem.shape) < fill).astype(np.uint8)
+        seconds = best_time(lambda: conflicts(sol, problem), number=20)
+        results[f"{tas}x{sections}"] = {'seconds': seconds, 'seconds_per_cell': seconds / sol.size}
+    return results
+
+
+def evolve_throughput(problem, n=5000, seed=0):
+    """ Evaluations per second of an assignta-style evolve run with a fixed seed """
+    E = evo.Evo(bits=True, seed=seed)
+    E.add_delta_objective(OBJECTIVES, problem.stats, problem.delta)
+    for _ in range(10):
+        E.add_solution(E.rng.integers(2, size=problem.shape))
+    E.add_agent("one_mutation", one_mutation, k=1)
+    E.add_agent("crossover_rows", crossover_rows, k=2, mutates=False)
+    E.add_agent("randomize", randomize, k=1)
+    E.add_agent("crossover_columns", crossover_columns, k=2, mutates=False)
+
+    start = time.perf_counter()
+    E.evolve(n=n, dom=100, status=None, time_limit=None)
+    elapsed = time.perf_counter() - start
+    return {'iterations': E.iteration,
+            'evaluations': E.evaluations,
+            'seconds': elapsed,
+            'evaluations_per_second': E.evaluations / elapsed,
+            'front_size': len(E.pop)}
+
+
+def commit():
+    """ Current git commit, if any, so results can be lined up with the history """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="JSON file to write (default: print to stdout)")
+    parser.add_argument("--data", default="assignta_data", help="folder with sections.csv and tas.csv")
+    parser.add_argument("--iterations", type=int, default=5000, help="evolve iterations per problem")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {'commit': commit(),
+               'python': platform.python_version(),
+               'numpy': np.__version__,
+               'seed': args.seed,
+               'objectives': {},
+               'remove_dominated': dominance_scaling(seed=args.seed),
+               'conflicts_scaling': conflicts_scaling(seed=args.seed),
+               'evolve': {}}
+    for name, problem in problems(args.data).items():
+        results['objectives'][name] = objective_throughput(problem, seed=args.seed)
+        results['evolve'][name] = evolve_throughput(problem, n=args.iterations, seed=args.seed)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
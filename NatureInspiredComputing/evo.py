@@ -4,58 +4,542 @@ Description: A concise evolutionary computing framework for solving
             multi-objective optimization problems!
 """
 
-import random as rnd
-import copy   # doing deep copies of solutions when generating offspring
-from functools import reduce  # for discarding dominated (bad) solutions
+import inspect  # to find agents that take an rng
+import json  # for RNG states in checkpoints
+from bisect import bisect_right  # for the 3-objective staircase sweep
 import numpy as np
 import pandas as pd
+import os
+import tempfile  # for atomic checkpoint writes
+import hashlib  # for content keys of solutions
+from collections import OrderedDict  # LRU memo of scores
 import time
+import multiprocessing as mp
+import threading  # for BrokenBarrierError
+from concurrent.futures import ProcessPoolExecutor  # for island model evolution
+from stopping import WallTime, ConvergenceTracker
+from scheduler import UniformScheduler
+from instrumentation import RunStats
+from reporter import solution_id
+
+
+def non_dominated(scores):
+    """ Pareto filter over an (N, k) matrix of objective scores (lower is better).
+    Returns a boolean mask of the rows that no other row dominates.
+    Equal rows never dominate each other, so duplicates share the same answer. """
+    scores = np.asarray(scores, dtype=float)
+    n, k = scores.shape
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    # sort rows lexicographically and collapse duplicates; in this order
+    # a row can only be dominated by rows that come before it
+    order = np.lexsort(scores.T[::-1])
+    ordered = scores[order]
+    first = np.ones(n, dtype=bool)
+    first[1:] = np.any(ordered[1:] != ordered[:-1], axis=1)
+    unique = ordered[first]
+
+    if k == 1:
+        keep = np.arange(len(unique)) == 0
+    elif k == 2:
+        keep = _sweep_2d(unique)
+    elif k == 3:
+        keep = _sweep_3d(unique)
+    else:
+        keep = _filter_nd(unique)
+
+    # map the answer for each unique row back to every original row
+    mask = np.empty(n, dtype=bool)
+    mask[order] = keep[np.cumsum(first) - 1]
+    return mask
+
+
+def _sweep_2d(unique):
+    """ 2 objectives: a row is dominated when an earlier row has a
+    second score no worse than its own """
+    best_before = np.minimum.accumulate(np.concatenate(([np.inf], unique[:-1, 1])))
+    return best_before > unique[:, 1]
+
+
+def _sweep_3d(unique):
+    """ 3 objectives: sweep in order of the first score, keeping a staircase of the
+    (second, third) scores seen so far; a row is dominated when a staircase step
+    is no worse than it on both """
+    keep = np.zeros(len(unique), dtype=bool)
+    ys, zs = [], []  # staircase: ys increasing, zs decreasing
+    for i, (_, y, z) in enumerate(unique.tolist()):
+        j = bisect_right(ys, y)
+        if j and zs[j - 1] <= z:
+            continue
+        keep[i] = True
+
+        # replace the steps this row now covers
+        end = j
+        while end < len(ys) and zs[end] >= z:
+            end += 1
+        ys[j:end] = [y]
+        zs[j:end] = [z]
+    return keep
+
+
+def _filter_nd(unique, block=256):
+    """ Any number of objectives: rows are taken `block` at a time and compared with
+    the front found so far, a block of front rows at a time, dropping each row as soon as
+    one dominates it; the survivors are then checked against the earlier rows of their block """
+    n, k = unique.shape
+    keep = np.zeros(n, dtype=bool)
+    columns = np.ascontiguousarray(unique.T)
+    front = columns[:, :0]  # (k, # front rows so far)
+    earlier = np.tri(block, k=-1, dtype=bool)  # earlier[b, a]: row a comes before row b
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))
+        for f in range(0, front.shape[1], block):
+            if not len(rows):
+                break
+            dominated = np.ones((min(block, front.shape[1] - f), len(rows)), dtype=bool)
+            for j in range(k):
+                dominated &= front[j, f:f + block, None] <= columns[j, rows]
+            rows = rows[~dominated.any(axis=0)]
+
+        # dominance is transitive, so comparing with every earlier row of the block is enough
+        dominated = earlier[np.ix_(rows - start, rows - start)]
+        for j in range(k):
+            dominated &= columns[j, rows][None, :] <= columns[j, rows][:, None]
+        rows = rows[~dominated.any(axis=1)]
+
+        keep[rows] = True
+        front = np.concatenate((front, columns[:, rows]), axis=1)
+    return keep
+
+
+class Population:
+    """ Solutions kept in one contiguous tensor with a matching score matrix.
+    Row i of scores holds the objective values of solution i.
+    With bits=True, 0/1 solutions are stored bit-packed along their last axis,
+    8 cells per byte; get() returns them unpacked. With dtype=object, solutions are
+    arbitrary objects (e.g. a sparse encoding) kept in a 1-D object array; they
+    need copy() and tobytes() methods, and to_dense() for saving. """
+
+    def __init__(self, names=(), capacity=64, dtype=None, bits=False):
+        """ names: objective names, one per score column
+        capacity: initial number of slots (grows by doubling)
+        dtype: storage type for solutions (defaults to that of the first solution; object for solution objects)
+        bits: store 0/1 solutions bit-packed (np.packbits along the last axis) """
+        self.names = tuple(names)
+        self.capacity = capacity
+        self.dtype = dtype
+        self.bits = bits
+        self.shape = None  # unpacked shape of one solution
+        self.solutions = None  # (capacity, *stored solution shape) tensor, allocated on first add
+        self.scores = None  # (capacity, # objectives) matrix
+        self.stats = [None] * capacity  # cached delta objective statistics per slot
+        self.keys = [None] * capacity  # content key (digest of the stored bytes) per slot
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def objects(self):
+        """ True if solutions are stored as objects rather than arrays """
+        return self.dtype is object
+
+    def encode(self, sols):
+        """ Stored form of a solution or stack of solutions """
+        return np.packbits(sols, axis=-1) if self.bits else sols
+
+    def get(self, idx):
+        """ Solution(s) at a slot, slice or index array in unpacked form
+        (views into the tensor unless bit-packed) """
+        stored = self.solutions[idx]
+        if not self.bits:
+            return stored
+        sols = np.unpackbits(stored, axis=-1, count=self.shape[-1])
+        return sols if self.dtype is None else sols.astype(self.dtype, copy=False)
+
+    def stored_form(self, sols):
+        """ Contiguous stored form of a solution or stack, cast to the storage dtype
+        so that equal solutions passed with different dtypes have the same bytes """
+        stored = self.encode(np.asarray(sols))
+        dtype = self.solutions.dtype if self.solutions is not None else (None if self.bits else self.dtype)
+        return np.ascontiguousarray(stored if dtype is None else stored.astype(dtype, copy=False))
+
+    def key(self, sol):
+        """ Content key of a solution: a 16-byte digest of its stored form """
+        if self.objects:
+            return hashlib.blake2b(sol.tobytes(), digest_size=16).digest()
+        return hashlib.blake2b(self.stored_form(sol).data, digest_size=16).digest()
+
+    def keys_for(self, sols):
+        """ Content keys of a stack of solutions, encoding the stack once """
+        if self.objects:
+            return [self.key(sol) for sol in sols]
+        stored = self.stored_form(sols)
+        return [hashlib.blake2b(row.data, digest_size=16).digest() for row in stored]
+
+    def add(self, sol, scores, stats=None, key=None):
+        """ Store a solution with its scores and return its slot """
+        sol = sol if self.objects else np.asarray(sol)
+        scores = np.asarray(scores)
+        if self.solutions is None and self.objects:
+            self.shape = getattr(sol, 'shape', None)
+            self.solutions = np.empty(self.capacity, dtype=object)
+            self.scores = np.empty((self.capacity, len(scores)), dtype=scores.dtype)
+        elif self.solutions is None:
+            self.shape = sol.shape
+            stored = self.encode(sol)
+            dtype = stored.dtype if self.dtype is None or self.bits else self.dtype
+            self.solutions = np.empty((self.capacity,) + stored.shape, dtype=dtype)
+            self.scores = np.empty((self.capacity, len(scores)), dtype=scores.dtype)
+        elif not np.can_cast(scores.dtype, self.scores.dtype):
+            self.scores = self.scores.astype(np.result_type(self.scores, scores))
+        if self.size == self.capacity:
+            self._grow()
+
+        slot = self.size
+        self.solutions[slot] = self.encode(sol)
+        self.scores[slot] = scores
+        self.stats[slot] = stats
+        self.keys[slot] = self.key(sol) if key is None else key
+        self.size += 1
+        return slot
+
+    def add_many(self, sols, scores, keys=None):
+        """ Store a stack of solutions with their (N, # objectives) scores """
+        if self.objects:
+            for sol, row, key in zip(sols, scores, self.keys_for(sols) if keys is None else keys):
+                self.add(sol, row, key=key)
+            return
+        sols = np.asarray(sols)
+        scores = np.asarray(scores)
+        keys = self.keys_for(sols) if keys is None else keys
+        if self.solutions is None:
+            self.add(sols[0], scores[0], key=keys[0])
+            sols, scores, keys = sols[1:], scores[1:], keys[1:]
+        elif not np.can_cast(scores.dtype, self.scores.dtype):
+            self.scores = self.scores.astype(np.result_type(self.scores, scores))
+        while self.size + len(sols) > self.capacity:
+            self._grow()
+
+        end = self.size + len(sols)
+        self.solutions[self.size:end] = self.encode(sols)
+        self.scores[self.size:end] = scores
+        self.stats[self.size:end] = [None] * len(sols)
+        self.keys[self.size:end] = keys
+        self.size = end
+
+    def _grow(self):
+        """ Double the number of slots """
+        self.capacity *= 2
+        solutions = np.empty((self.capacity,) + self.solutions.shape[1:], dtype=self.solutions.dtype)
+        solutions[:self.size] = self.solutions[:self.size]
+        scores = np.empty((self.capacity, self.scores.shape[1]), dtype=self.scores.dtype)
+        scores[:self.size] = self.scores[:self.size]
+        self.solutions, self.scores = solutions, scores
+        self.stats.extend([None] * (self.capacity - len(self.stats)))
+        self.keys.extend([None] * (self.capacity - len(self.keys)))
+
+    def sample(self, k, rng):
+        """ Slots of k random solutions, drawn from rng (a numpy Generator) """
+        return rng.integers(self.size, size=k).tolist()
+
+    def compact(self, keep):
+        """ Keep only the slots where the boolean mask keep is True,
+        moving them to the front in place """
+        idx = np.flatnonzero(keep)
+        m = len(idx)
+        self.solutions[:m] = self.solutions[idx]
+        self.scores[:m] = self.scores[idx]
+        self.stats[:self.size] = [self.stats[i] for i in idx] + [None] * (self.size - m)
+        self.keys[:self.size] = [self.keys[i] for i in idx] + [None] * (self.size - m)
+        self.size = m
+
+    def latest_unique(self, max_ties=1):
+        """ Boolean mask keeping the newest copy of each distinct solution, and only
+        the newest max_ties solutions for each distinct score vector (None for no limit) """
+        mask = np.zeros(self.size, dtype=bool)
+        seen = set()
+        for i in range(self.size - 1, -1, -1):
+            if self.keys[i] not in seen:
+                seen.add(self.keys[i])
+                mask[i] = True
+        if max_ties is None:
+            return mask
+
+        # rank the remaining solutions within each score vector, newest first
+        scores = self.scores[:self.size]
+        order = np.lexsort((-np.arange(self.size),) + tuple(scores.T[::-1]))
+        order = order[mask[order]]
+        ordered = scores[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = np.any(ordered[1:] != ordered[:-1], axis=1)
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+        mask[order[np.arange(len(order)) - group_start >= max_ties]] = False
+        return mask
+
+    def index(self):
+        """ Population index: score vector (as a tuple) --> slots of every solution with it """
+        index = {}
+        for i, row in enumerate(self.scores[:self.size].tolist()):
+            index.setdefault(tuple(row), []).append(i)
+        return index
+
+    def items(self):
+        """ Iterate over (evaluation, solution) pairs where
+        evaluation = ( (objname1, objvalue1), (objname2, objvalue2), ...... ) """
+        for i in range(self.size):
+            yield tuple(zip(self.names, self.scores[i].tolist())), self.get(i)
 
 
 class Evo:
 
-    def __init__(self):
-        """framework constructor"""
-        self.pop = {}  # population of solutions: evaluation --> solution
+    def __init__(self, dtype=None, bits=False, memo_size=100000, max_ties=1, scheduler=None, run_stats=None,
+                 seed=None):
+        """framework constructor
+        dtype: storage type for solutions in the population (e.g. np.uint8 for binary matrices,
+               object for solution objects such as sparse_assignment.SparseAssignment)
+        bits: store 0/1 solutions bit-packed, 8 cells per byte
+        memo_size: # of recent solutions whose scores are remembered to skip re-evaluation (0 to disable)
+        max_ties: # of distinct solutions kept per objective vector (None for no limit)
+        scheduler: picks the agent evolve runs next (see scheduler.py; uniform by default)
+        run_stats: RunStats collecting timings and throughput (see instrumentation.py; a new one by default)
+        seed: seed for every random draw of the run (parent and agent picks, agents that
+              take an rng, island streams); None for a fresh one """
+        self.pop = Population(dtype=dtype, bits=bits)  # population of solutions: solution tensor + score matrix
+        self.memo = OrderedDict()  # LRU memo:   content key --> scores
+        self.memo_size = memo_size
+        self.max_ties = max_ties
+        self.lookups = 0  # solutions looked up in the memo
+        self.duplicates = 0  # lookups that found an already-scored solution
         self.fitness = {}  # objectives:    name --> objective function (f)
-        self.agents = {}  # agents:   name --> (operator/function,  num_solutions_input)
+        self.agents = {}  # agents:   name --> (operator/function,  num_solutions_input, mutates_input)
+        self.batch_agents = {}  # batch agents:   name --> (vectorized operator, num_solutions_input)
+        self.scratch = None  # preallocated buffers that mutating agents receive their picks in
+        self.batch_fitness = None  # batch objectives: (names, f) scoring a stack of solutions at once
+        self.delta_fitness = None  # delta objectives: (names, init, update, max_cells) for incremental scoring
+        self.evaluations = 0  # number of solutions evaluated so far
+        self.iteration = 0  # agent invocations run by evolve so far
+        self.generation = 0  # generations run by evolve_batches so far
+        self.tracker = None  # convergence tracker of the latest run
+        self.scheduler = scheduler if scheduler is not None else UniformScheduler()
+        self.run_stats = run_stats if run_stats is not None else RunStats()
+        self.seed_sequence = np.random.SeedSequence(seed)  # root of all random streams (islands spawn from it)
+        self.rng = np.random.default_rng(self.seed_sequence)
 
     def add_objective(self, name, f):
         """ Register a new objective for evaluating solutions """
         self.fitness[name] = f
-
-    def add_agent(self, name, op, k=1):
-        """ Register an agent take works on k input solutions """
-        self.agents[name] = (op, k)
+        self.pop.names = self.objective_names()
+
+    def add_batch_objective(self, names, f):
+        """ Register a function that scores a stack of solutions for several objectives at once.
+        f maps an (N, ...) array of solutions (a list, for solution objects) to an
+        (N, len(names)) array of scores.
+        The same names may also be registered as a delta objective: the batch function
+        then scores fresh solutions and the delta hook scores small mutations. """
+        self.batch_fitness = (tuple(names), f)
+        self.pop.names = self.objective_names()
+
+    def add_delta_objective(self, names, init, update, max_cells=16):
+        """ Register objectives that can be rescored incrementally from a parent.
+        init(sol) builds a statistics object whose .scores holds one score per name.
+        update(stats, sol, cells) returns new statistics for sol, given the parent's
+        stats and the (row, col) cells where sol differs from that parent.
+        Children differing from their parent in more than max_cells cells are rescored with init. """
+        self.delta_fitness = (tuple(names), init, update, max_cells)
+        self.pop.names = self.objective_names()
+
+    def objective_names(self):
+        """ Names of all registered objectives, in score column order """
+        names = ()
+        if self.delta_fitness is not None:
+            names += self.delta_fitness[0]
+        if self.batch_fitness is not None and not self._shared_batch():
+            names += self.batch_fitness[0]
+        return names + tuple(self.fitness.keys())
+
+    def _shared_batch(self):
+        """ True if the batch and delta objectives score the same objectives """
+        return (self.batch_fitness is not None and self.delta_fitness is not None
+                and self.batch_fitness[0] == self.delta_fitness[0])
+
+    def add_agent(self, name, op, k=1, mutates=True):
+        """ Register an agent take works on k input solutions
+        mutates: False if the agent never writes to its inputs; it then receives
+        read-only views of the population instead of copies
+        An agent with an `rng` parameter is passed Evo's numpy Generator to draw from. """
+        self.agents[name] = (op, k, mutates, _takes_rng(op))
+
+    def add_batch_agent(self, name, op, k=1):
+        """ Register a vectorized agent for evolve_batches. op receives a (k, B, ...) array
+        of parent solutions (a fresh copy it may modify) and returns B children as (B, ...)
+        An agent with an `rng` parameter is passed Evo's numpy Generator to draw from. """
+        self.batch_agents[name] = (op, k, _takes_rng(op))
 
     def get_random_solutions(self, k=1):
         """ Picks k random solutions from the population
-        and returns them as a list of deep-copies """
+        and returns them as a list of copies """
         if len(self.pop) == 0:  # No solutions - this shouldn't happen!
             return []
         else:
-            solutions = tuple(self.pop.values())
-            return [copy.deepcopy(rnd.choice(solutions)) for _ in range(k)]
-
+            return [self.pop.get(i).copy() for i in self.pop.sample(k, self.rng)]
+
+    def _picks(self, slots, mutates=True):
+        """ The solutions in slots as agent inputs: copies in the scratch buffers
+        for agents that mutate their inputs, read-only views otherwise
+        (solution objects are copied when mutated and passed as they are otherwise) """
+        if self.pop.objects:
+            return [self.pop.get(i).copy() if mutates else self.pop.get(i) for i in slots]
+        if not mutates:
+            picks = [self.pop.get(i) for i in slots]
+            for pick in picks:
+                pick.flags.writeable = False
+            return picks
+
+        # (re)allocate the scratch buffers when the solution shape or k grows
+        sample = self.pop.get(slots[0])
+        if (self.scratch is None or self.scratch.shape[1:] != sample.shape
+                or self.scratch.dtype != sample.dtype or len(self.scratch) < len(slots)):
+            self.scratch = np.empty((len(slots),) + sample.shape, dtype=sample.dtype)
+        for j, i in enumerate(slots):
+            np.copyto(self.scratch[j], self.pop.get(i))
+        return [self.scratch[j] for j in range(len(slots))]
+
+
+    def evaluate(self, sols, stats=None):
+        """ Evaluate a list (or stacked array) of solutions wrt each registered objective.
+        stats: optional delta objective statistics already computed for each solution
+        Returns an (N, # objectives) array of scores, columns ordered as objective_names() """
+        self.evaluations += len(sols)
+        self.run_stats.evaluations += len(sols)
+        columns = []
+
+        # Read delta objective scores off the cached statistics
+        if self.delta_fitness is not None:
+            init = self.delta_fitness[1]
+            if stats is None and not self._shared_batch():
+                start = time.perf_counter()
+                stats = [init(sol) for sol in sols]
+                self.run_stats.add('objective', 'delta', time.perf_counter() - start, len(sols))
+            if stats is not None:
+                columns.append(np.array([st.scores for st in stats]))
+
+        # Score the whole stack in one call if a batch objective is registered
+        if self.batch_fitness is not None and not (self._shared_batch() and stats is not None):
+            f = self.batch_fitness[1]
+            start = time.perf_counter()
+            stack = sols if isinstance(sols, np.ndarray) or self.pop.objects else np.stack(sols)
+            columns.append(np.asarray(f(stack)))
+            self.run_stats.add('objective', 'batch', time.perf_counter() - start, len(sols))
+
+        for name, f in self.fitness.items():
+            start = time.perf_counter()
+            columns.append(np.array([f(sol) for sol in sols]))
+            self.run_stats.add('objective', name, time.perf_counter() - start, len(sols))
+        return np.column_stack(columns)
 
     def add_solution(self, sol):
         """ Adds the solution to the current population.
         Added solutions are evaluated wrt each registered objective. """
-
-        # Create the evaluation key
-        # key:  ( (objname1, objvalue1), (objname2, objvalue2), ...... )
-        eval = tuple([(name, f(sol)) for name, f in self.fitness.items()])
-
-        # Add to the dictionary
-        self.pop[eval] = sol
+        self.add_solutions([sol])
+
+    def add_solutions(self, sols, parents=None):
+        """ Adds a list of solutions to the current population,
+        scoring them together so batch objectives run once.
+        parents: optional population slot of each solution's parent, letting
+        delta objectives update the parent's cached statistics instead of rescoring """
+        keys = self.pop.keys_for(sols) if isinstance(sols, np.ndarray) else [self.pop.key(sol) for sol in sols]
+        remembered = [self._recall(key) for key in keys]
+
+        # score only the solutions the memo has not seen
+        misses = [i for i, scores in enumerate(remembered) if scores is None]
+        stats = [None] * len(sols)
+        if misses:
+            miss_sols = sols[misses] if isinstance(sols, np.ndarray) else [sols[i] for i in misses]
+            miss_parents = None if parents is None else [parents[i] for i in misses]
+            miss_stats = self._delta_stats(miss_sols, miss_parents)
+            scores = self.evaluate(miss_sols, miss_stats)
+            for j, i in enumerate(misses):
+                remembered[i] = scores[j]
+                stats[i] = None if miss_stats is None else miss_stats[j]
+                self._remember(keys[i], scores[j])
+
+        if isinstance(sols, np.ndarray) and not any(st is not None for st in stats):
+            self.pop.add_many(sols, np.array(remembered), keys)
+            return
+        for sol, scores, st, key in zip(sols, remembered, stats, keys):
+            self.pop.add(sol, scores, st, key)
+
+    def _recall(self, key):
+        """ Scores of an already evaluated solution, or None """
+        if self.memo_size == 0:
+            return None
+        self.lookups += 1
+        scores = self.memo.get(key)
+        if scores is not None:
+            self.duplicates += 1
+            self.memo.move_to_end(key)
+        return scores
+
+    def _remember(self, key, scores):
+        """ Store scores in the memo, evicting the least recently used entry when full """
+        if self.memo_size == 0:
+            return
+        self.memo[key] = scores
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+
+    def duplicate_rate(self):
+        """ Share of memo lookups that found an already evaluated solution """
+        return self.duplicates / self.lookups if self.lookups else 0.0
+
+    def _delta_stats(self, sols, parents=None):
+        """ Delta objective statistics for each solution, updated from the parent when
+        the child differs in only a few cells and computed from scratch otherwise.
+        Returns None when there are no parents and a shared batch objective can score them. """
+        if self.delta_fitness is None or (parents is None and self._shared_batch()):
+            return None
+        if parents is None:
+            parents = [None] * len(sols)
+
+        _, init, update, max_cells = self.delta_fitness
+        start = time.perf_counter()
+        stats = []
+        for sol, parent in zip(sols, parents):
+            if parent is not None and self.pop.stats[parent] is not None:
+                parent_sol = self.pop.get(parent)
+                if isinstance(sol, np.ndarray) and sol.shape == parent_sol.shape:
+                    cells = np.argwhere(sol != parent_sol)
+                    if len(cells) <= max_cells:
+                        stats.append(update(self.pop.stats[parent], sol, cells))
+                        continue
+            stats.append(init(sol))
+        self.run_stats.add('objective', 'delta', time.perf_counter() - start, len(sols))
+        return stats
 
 
     def run_agent(self, name):
-        """ Invoking a named agent against the current population """
-        op, k = self.agents[name]
-        picks = self.get_random_solutions(k)
-        new_solution = op(picks)
-        self.add_solution(new_solution)
+        """ Invoking a named agent against the current population.
+        Returns True if the child was accepted: a new solution that no
+        member of the population dominates """
+        op, k, mutates, takes_rng = self.agents[name]
+        if len(self.pop) == 0:
+            return False
+        slots = self.pop.sample(k, self.rng)
+        start = time.perf_counter()
+        picks = self._picks(slots, mutates)
+        new_solution = op(picks, rng=self.rng) if takes_rng else op(picks)
+        self.run_stats.add('agent', name, time.perf_counter() - start)
+
+        # the first pick is the parent used for incremental scoring
+        duplicates = self.duplicates
+        self.add_solutions([new_solution], parents=slots[:1])
+        if self.duplicates > duplicates:
+            return False
+        scores = self.pop.scores[:len(self.pop)]
+        child = scores[-1]
+        return not np.any(np.all(scores <= child, axis=1) & np.any(scores < child, axis=1))
 
 
     @staticmethod
@@ -68,49 +552,233 @@ class Evo:
         max_diff = max(score_diffs)
         return min_diff >= 0.0 and max_diff > 0.0
 
-    @staticmethod
-    def _reduce_nds(S, p):
-        return S - {q for q in S if Evo._dominates(p,q)}
-
     def remove_dominated(self):
         """ Remove solutions from the pop that are dominated (worse) compared
         to other existing solutions. This is what provides selective pressure
-        driving the population towards the pareto optimal tradeoff curve. """
-        nds = reduce(Evo._reduce_nds, self.pop.keys(), self.pop.keys())
-        self.pop = {k:self.pop[k] for k in nds}
+        driving the population towards the pareto optimal tradeoff curve.
+        Duplicate solutions are dropped, and only the newest max_ties solutions
+        are kept for each distinct evaluation. """
+        if len(self.pop) == 0:
+            return
+        start = time.perf_counter()
+        keep = non_dominated(self.pop.scores[:len(self.pop)]) & self.pop.latest_unique(self.max_ties)
+        self.pop.compact(keep)
+        self.run_stats.add('dominance', 'remove_dominated', time.perf_counter() - start)
 
     
-    def evolve(self, n=1, dom=100, status=1000):
+    def _start_run(self, time_limit, stop, tracker):
+        """ Set up the stopping criteria and convergence tracker for a run """
+        criteria = list(stop)
+        if time_limit is not None:
+            criteria.append(WallTime(time_limit))
+        for criterion in criteria:
+            criterion.start(self)
+        self.run_stats.start()
+        self.tracker = tracker if tracker is not None else ConvergenceTracker()
+        return criteria
+
+    def _should_stop(self, criteria, i):
+        """ Record a convergence check and test the stopping criteria """
+        self.tracker.update(self.pop.scores[:len(self.pop)], i, self.evaluations)
+        self.run_stats.sample(i, self.evaluations, len(self.pop))
+        for criterion in criteria:
+            if criterion.should_stop(self, self.tracker):
+                print(f"{criterion.reason}, stopping evolution.")
+                return True
+        return False
+
+    def evolve(self, n=1, dom=100, status=1000, time_limit=300, stop=(), tracker=None,
+               checkpoint=None, checkpoint_every=10000, reporter=None):
         """ Run the framework (start evolving solutions)
-        n = # of random agent invocations (# of generations) """
-        time_limit = 300
-        start_time = time.time()  # Record the start time
+        n = # of random agent invocations (# of generations), continuing from self.iteration
+        dom = # of iterations between dominance passes; stopping criteria are checked after each
+        status = # of iterations between status reports (None for no reports)
+        time_limit = seconds before stopping (None for no limit)
+        stop = extra stopping criteria (see stopping.py)
+        tracker = ConvergenceTracker to record into (a new one by default, kept as self.tracker)
+        checkpoint = .npz path rewritten every checkpoint_every iterations (None for no checkpoints)
+        reporter = FrontReporter streaming the front at each status report and at the end
+                   (see reporter.py; save_front writes the full solutions on demand) """
+        criteria = self._start_run(time_limit, stop, tracker)
 
         agent_names = list(self.agents.keys())
-        for i in range(n):
-            # Check if the time limit has been exceeded
-            if time.time() - start_time > time_limit:
-                print(f"Time limit of {time_limit} seconds reached, stopping evolution.")
-                break
-            pick = rnd.choice(agent_names)  # pick an agent to run
-            self.run_agent(pick)
+        for i in range(self.iteration, self.iteration + n):
+            pick = self.scheduler.pick(agent_names, self.rng)  # pick an agent to run
+            start = time.perf_counter()
+            accepted = self.run_agent(pick)
+            self.scheduler.record(pick, accepted, time.perf_counter() - start)
+            self.iteration = i + 1
+            if checkpoint and self.iteration % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint)
             if i % dom == 0:
                 self.remove_dominated()
-            if i % status == 0:
+                if self._should_stop(criteria, i):
+                    break
+            if status and i % status == 0:
                 self.remove_dominated()
                 print("Iteration: ", i)
                 print("Population size: ", len(self.pop))
-                print(self)
+                print(self.scheduler.report())
+                print(self.run_stats.report())
+                if reporter is not None:
+                    reporter.report(self, i)
 
         self.remove_dominated()
+        if reporter is not None:
+            reporter.report(self, self.iteration)
+        self.run_stats.finish(self.iteration, self.evaluations, len(self.pop))
+
+    def evolve_batches(self, n=1, batch=256, status=100, time_limit=300, stop=(), tracker=None,
+                       checkpoint=None, checkpoint_every=100, reporter=None):
+        """ Run the framework generationally: each step one batch agent builds
+        `batch` children from randomly drawn parents, the whole batch is scored with
+        one evaluate call and merged with a single dominance filter.
+        n = # of generations, continuing from self.generation
+        status = # of generations between status reports (None for no reports)
+        time_limit, stop, tracker, checkpoint, reporter: as for evolve, checked after every generation """
+        criteria = self._start_run(time_limit, stop, tracker)
+
+        agent_names = list(self.batch_agents.keys())
+        for i in range(self.generation, self.generation + n):
+            name = agent_names[self.rng.integers(len(agent_names))]
+            op, k, takes_rng = self.batch_agents[name]
+
+            # gather k parents per child in one fancy-indexing copy: shape (k, batch, ...)
+            parents = self.pop.get(self.rng.integers(len(self.pop), size=(k, batch)))
+            start = time.perf_counter()
+            children = op(parents, rng=self.rng) if takes_rng else op(parents)
+            self.run_stats.add('agent', name, time.perf_counter() - start)
+            self.add_solutions(children)
+            self.remove_dominated()
+            self.generation = i + 1
+            if checkpoint and self.generation % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint)
+            if self._should_stop(criteria, i):
+                break
+
+            if status and i % status == 0:
+                print("Generation: ", i)
+                print("Population size: ", len(self.pop))
+                print(self.run_stats.report())
+                if reporter is not None:
+                    reporter.report(self, i)
+
+        if reporter is not None:
+            reporter.report(self, self.generation)
+        self.run_stats.finish(self.generation, self.evaluations, len(self.pop))
+
+    def save_checkpoint(self, path):
+        """ Write the population, RNG state and counters to a compressed .npz file.
+        The file is written next to path and renamed into place, so a run killed
+        mid-write leaves the previous checkpoint intact. """
+        arrays = self._population_arrays()
+        arrays.update({'counters': np.array([self.iteration, self.generation, self.evaluations]),
+                       # the Generator's state holds 128-bit integers, so it is kept as JSON text
+                       'rng_state': np.array(json.dumps(self.rng.bit_generator.state))})
+        _write_npz(path, arrays)
+
+    def save_front(self, path):
+        """ Write the non-dominated solutions and their scores to a compact .npz file
+        (0/1 solutions bit-packed), with the IDs a FrontReporter streams; read it back with load_front """
+        self.remove_dominated()
+        _write_npz(path, self._population_arrays())
+
+    def _population_arrays(self):
+        """ The population as .npz arrays: objective names, scores and solutions,
+        bit-packed along the last axis when they only hold 0s and 1s """
+        size = len(self.pop)
+        arrays = {'names': np.array(self.pop.names, dtype=str),
+                  'scores': self.pop.scores[:size] if size else np.empty((0, len(self.pop.names))),
+                  'ids': np.array([solution_id(key) for key in self.pop.keys[:size]], dtype=str)}
+        if size:
+            solutions = self.pop.solutions[:size]
+            if self.pop.objects:
+                solutions = np.stack([sol.to_dense() for sol in solutions])
+            binary = solutions.dtype.kind in 'biu' and solutions.min() >= 0 and solutions.max() <= 1
+            if not self.pop.bits and binary:
+                solutions = np.packbits(solutions, axis=-1)
+            if self.pop.bits or binary:
+                arrays['bit_cols'] = np.array(self.pop.shape[-1])
+            arrays['solutions'] = solutions
+        return arrays
+
+    def resume(self, path, convert=None):
+        """ Restore the population, RNG state and counters from a checkpoint.
+        Objectives and agents are not saved: register the same ones before resuming.
+        Continue with evolve(n - self.iteration) to finish the original run.
+        convert: function turning each saved (dense) solution back into a solution object,
+        for dtype=object populations (e.g. SparseAssignment.from_dense) """
+        with np.load(path) as data:
+            names = tuple(data['names'].tolist())
+            if names != self.pop.names:
+                raise ValueError(f"Checkpoint objectives {names} do not match {self.pop.names}")
+
+            self.pop.size = 0
+            if 'solutions' in data:
+                solutions = _npz_solutions(data)
+                if convert is not None:
+                    solutions = [convert(sol) for sol in solutions]
+                self.pop.add_many(solutions, data['scores'])
+            self.iteration, self.generation, self.evaluations = data['counters'].tolist()
+
+            self.rng.bit_generator.state = json.loads(str(data['rng_state']))
+        return self
+
+    def evolve_islands(self, islands=None, n=1, dom=100, migrate=1000, migrants=10, convert=None):
+        """ Run the framework as several independent islands, one per process.
+        Each island starts from a copy of the current population and runs n agent
+        invocations. Every `migrate` invocations it posts up to `migrants` of its
+        non-dominated solutions to shared memory and takes in those of its
+        neighbour on a ring. The final fronts of all islands are merged into this population.
+        Each island draws from its own stream spawned from the seed, and islands
+        migrate in lockstep, so a seeded run gives the same result every time.
+        islands = # of islands / worker processes (defaults to the number of cores)
+        convert = function turning a migrant's dense form back into a solution object;
+                  required for object populations, whose migrants travel as to_dense() arrays
+                  (e.g. SparseAssignment.from_dense, as for resume)
+        Objectives and agents must be picklable (module-level functions or bound methods). """
+        if self.pop.objects and convert is None:
+            raise ValueError("Object populations migrate in dense form: pass convert "
+                             "(e.g. SparseAssignment.from_dense) to evolve_islands")
+        islands = islands or os.cpu_count()
+        self.remove_dominated()
+        if len(self.pop) == 0:
+            return
+
+        # shared memory slots for migration: per island a count, solutions and scores
+        sample = self.pop.get(0)
+        if self.pop.objects:
+            sample = sample.to_dense()
+        board = (mp.RawArray('q', islands),
+                 mp.RawArray('B', islands * migrants * sample.nbytes),
+                 mp.RawArray('B', islands * migrants * self.pop.scores[0].nbytes))
+        layout = (islands, migrants, sample.shape, sample.dtype.str, self.pop.scores.shape[1],
+                  self.pop.scores.dtype.str)
+        barrier = mp.Barrier(islands)
+
+        seeds = self.seed_sequence.spawn(islands)
+        with ProcessPoolExecutor(max_workers=islands, initializer=_init_island,
+                                 initargs=(board, barrier, layout)) as pool:
+            futures = [pool.submit(_run_island, self, index, n, dom, migrate, seeds[index], convert)
+                       for index in range(islands)]
+            errors = [future.exception() for future in futures]
+
+        # a failing island breaks the barrier for the rest; raise its error, not theirs
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise next((error for error in errors if not isinstance(error, threading.BrokenBarrierError)), errors[0])
+        results = [future.result() for future in futures]
+
+        # merge every island's front and keep the overall non-dominated set
+        for solutions, scores in results:
+            for sol, row in zip(solutions, scores):
+                self.pop.add(sol, row)
+        self.remove_dominated()
 
 
     def __str__(self):
         """ Output the solutions in the population """
-        rslt = ""
-        for eval,sol in self.pop.items():
-            rslt += str(dict(eval))+":\t"+str(sol)+"\n"
-        return rslt
+        return "".join(str(dict(eval))+":\t"+str(sol)+"\n" for eval, sol in self.pop.items())
 
     def summarize(self):
         """ Summarize the non-dominated solutions into a summary table. """
@@ -128,7 +796,7 @@ class Evo:
             objective_values = {name: score for name, score in eval}
 
             # Convert the solution and its objectives into a dictionary
-            solution_summary = {**objective_values, 'Solution': sol, 'Group Name': 'ArjunS'}
+            solution_summary = {**objective_values, 'Solution': sol.copy(), 'Group Name': 'ArjunS'}
             summary_data.append(solution_summary)
 
         # Convert the summary data to a pandas DataFrame for easy table format
@@ -137,5 +805,109 @@ class Evo:
         return summary_df
 
 
-
-
+def _takes_rng(op):
+    """ True if an agent accepts an rng argument """
+    try:
+        return 'rng' in inspect.signature(op).parameters
+    except (TypeError, ValueError):  # builtins without a signature
+        return False
+
+
+def _write_npz(path, arrays):
+    """ Write arrays to a compressed .npz file atomically: the file is written next
+    to path and renamed into place, so a crash mid-write leaves the old file intact """
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as f:
+        np.savez_compressed(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    # temporary files are private (0600); give the result the usual permissions
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(f.name, 0o666 & ~umask)
+    os.replace(f.name, path)
+
+
+def _npz_solutions(data):
+    """ Solutions stored by Evo in an .npz file, unpacked if they were bit-packed """
+    solutions = data['solutions']
+    if 'bit_cols' in data:
+        solutions = np.unpackbits(solutions, axis=-1, count=int(data['bit_cols']))
+    return solutions
+
+
+def load_front(path, with_ids=False):
+    """ Read a file written by Evo.save_front.
+    Returns (objective names, (N, # objectives) scores, (N, ...) solutions),
+    plus the N solution IDs (as streamed by a FrontReporter) if with_ids """
+    with np.load(path) as data:
+        names = tuple(data['names'].tolist())
+        solutions = _npz_solutions(data) if 'solutions' in data else None
+        if with_ids:
+            return names, data['scores'], solutions, data['ids'].tolist()
+        return names, data['scores'], solutions
+
+
+# Island state of a worker process, set once by _init_island
+_board = None
+
+
+def _init_island(board, barrier, layout):
+    """ Worker initializer: keep the shared migration slots and the barrier islands meet at """
+    global _board
+    _board = (board, barrier, layout)
+
+
+def _migration_slots():
+    """ NumPy views of the shared migration slots: counts, solutions and scores per island """
+    (counts, solutions, scores), _, (islands, migrants, shape, dtype, k, score_dtype) = _board
+    counts = np.frombuffer(counts, dtype=np.int64)
+    solutions = np.frombuffer(solutions, dtype=dtype).reshape((islands, migrants) + tuple(shape))
+    scores = np.frombuffer(scores, dtype=score_dtype).reshape(islands, migrants, k)
+    return counts, solutions, scores
+
+
+def _run_island(evo, index, n, dom, migrate, seed, convert=None):
+    """ Evolve one island in a worker process, migrating through shared memory.
+    seed: the island's SeedSequence
+    convert: function restoring object solutions from the dense form they migrate in
+    Returns the island's final solutions and scores. """
+    evo.rng = np.random.default_rng(seed)
+    np.random.seed(seed.generate_state(1))  # for agents that still draw from the global NumPy RNG
+    counts, solutions, scores = _migration_slots()
+    barrier = _board[1]
+    islands, migrants = len(counts), solutions.shape[1]
+    source = (index - 1) % islands
+
+    done = 0
+    try:
+        while done < n:
+            steps = min(migrate, n - done)
+            evo.evolve(steps, dom=dom, status=None, time_limit=None)
+            done += steps
+
+            # post a random sample of this island's front, then wait for every island to post
+            size = len(evo.pop)
+            chosen = evo.rng.choice(size, min(migrants, size), replace=False)
+            posted = evo.pop.get(chosen)
+            if evo.pop.objects:
+                posted = np.stack([sol.to_dense() for sol in posted])
+            solutions[index, :len(chosen)] = posted
+            scores[index, :len(chosen)] = evo.pop.scores[chosen]
+            counts[index] = len(chosen)
+            barrier.wait()
+
+            # take in the neighbour's post; nobody posts again until every island has read
+            m = counts[source]
+            arrivals = solutions[source, :m].copy(), scores[source, :m].copy()
+            barrier.wait()
+            for sol, row in zip(*arrivals):
+                evo.pop.add(sol if convert is None else convert(sol), row)
+    except BaseException:
+        # release the islands waiting for this one; they raise BrokenBarrierError
+        barrier.abort()
+        raise
+
+    evo.remove_dominated()
+    size = len(evo.pop)
+    return evo.pop.get(slice(0, size)).copy(), evo.pop.scores[:size].copy()
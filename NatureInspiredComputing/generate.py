@@ -0,0 +1,71 @@
+"""
+File: generate.py
+Description: Random TA assignment problems of any size, in the
+            sections.csv / tas.csv layout read by AssignTAProblem.from_csv.
+
+            python generate.py synthetic_data --tas 400 --sections 170 --conflict-density 0.02
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+
+def lab_times(n_slots):
+    """ n_slots distinct lab time labels in the 'R 1145' day + time style """
+    return [f"{'MTWRF'[s % 5]} {800 + 100 * (s // 5)}" for s in range(n_slots)]
+
+
+def generate_problem(tas=40, sections=17, conflict_density=None, seed=0):
+    """ Random sections and TAs data frames.
+    conflict_density: chance that two sections meet at the same time; sections are spread
+    evenly at random over 1 / conflict_density lab times (half the # of sections by default)
+    Returns (sections_df, tas_df) """
+    rng = np.random.default_rng(seed)
+    if conflict_density is None:
+        n_slots = max(1, sections // 2)
+    else:
+        n_slots = max(1, round(1 / conflict_density))
+    times = np.array(lab_times(n_slots))
+
+    min_ta = rng.integers(1, 4, size=sections)
+    sections_df = pd.DataFrame({'section': range(sections),
+                                'instructor': [f"instructor {s % 25}" for s in range(sections)],
+                                'daytime': times[rng.integers(n_slots, size=sections)],
+                                'location': [f"room {s % 40}" for s in range(sections)],
+                                'students': rng.integers(10, 40, size=sections),
+                                'topic': "lab",
+                                'min_ta': min_ta,
+                                'max_ta': min_ta + rng.integers(0, 3, size=sections)})
+
+    preferences = rng.choice(np.array(['U', 'W', 'P']), size=(tas, sections))
+    tas_df = pd.concat([pd.DataFrame({'ta_id': range(tas),
+                                      'name': [f"ta {t}" for t in range(tas)],
+                                      'max_assigned': rng.integers(1, 4, size=tas)}),
+                        pd.DataFrame(preferences, columns=[str(s) for s in range(sections)])], axis=1)
+    return sections_df, tas_df
+
+
+def write_problem(folder, tas=40, sections=17, conflict_density=None, seed=0):
+    """ Write a random problem as folder/sections.csv and folder/tas.csv """
+    sections_df, tas_df = generate_problem(tas, sections, conflict_density, seed)
+    os.makedirs(folder, exist_ok=True)
+    sections_df.to_csv(os.path.join(folder, "sections.csv"), index=False)
+    tas_df.to_csv(os.path.join(folder, "tas.csv"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder to write sections.csv and tas.csv to")
+    parser.add_argument("--tas", type=int, default=40)
+    parser.add_argument("--sections", type=int, default=17)
+    parser.add_argument("--conflict-density", type=float, default=None,
+                        help="chance that two sections meet at the same time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_problem(args.folder, args.tas, args.sections, args.conflict_density, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+File: instrumentation.py
+Description: Low-overhead run statistics for Evo: time spent per objective,
+            per agent and in dominance filtering, evaluation throughput and
+            population size over time, optionally streamed to a JSONL file.
+"""
+
+import json
+import time
+
+
+class RunStats:
+    """ Counters filled in by Evo as it runs. Timers are grouped by kind
+    ('objective', 'agent', 'dominance'), each mapping a name to [calls, seconds].
+    Population size is sampled at every dominance check and at the end of a run. """
+
+    def __init__(self, path=None, every=10):
+        """ path: JSONL file a summary line is appended to every `every` samples (None for no file) """
+        self.path = path
+        self.every = every
+        self.times = {'objective': {}, 'agent': {}, 'dominance': {}}
+        self.evaluations = 0  # solutions scored while these stats were attached
+        self.population = []  # one (iteration, evaluations, elapsed, size) sample per check
+        self.start_time = None
+
+    def start(self):
+        """ Start the clock, once, when the first run begins """
+        if self.start_time is None:
+            self.start_time = time.time()
+
+    def elapsed(self):
+        """ Seconds since the first run started """
+        return 0.0 if self.start_time is None else time.time() - self.start_time
+
+    def add(self, kind, name, seconds, calls=1):
+        """ Charge `seconds` over `calls` calls to a named timer """
+        timer = self.times[kind].setdefault(name, [0, 0.0])
+        timer[0] += calls
+        timer[1] += seconds
+
+    def sample(self, iteration, evaluations, size):
+        """ Record the population size, streaming a summary line every `every` samples """
+        self.population.append((iteration, evaluations, self.elapsed(), size))
+        if self.path is not None and len(self.population) % self.every == 0:
+            self.write()
+
+    def finish(self, iteration, evaluations, size):
+        """ Record the final state of a run and write it as the last summary line """
+        self.population.append((iteration, evaluations, self.elapsed(), size))
+        if self.path is not None:
+            self.write()
+
+    def evaluations_per_second(self):
+        elapsed = self.elapsed()
+        return self.evaluations / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """ All counters as a JSON-ready dict """
+        iteration, evaluations, _, size = self.population[-1] if self.population else (0, 0, 0.0, 0)
+        return {'iteration': iteration,
+                'evaluations': evaluations,
+                'elapsed': self.elapsed(),
+                'evaluations_per_second': self.evaluations_per_second(),
+                'population_size': size,
+                'times': {kind: {name: {'calls': calls, 'seconds': seconds}
+                                 for name, (calls, seconds) in timers.items()}
+                          for kind, timers in self.times.items()}}
+
+    def write(self):
+        """ Append the current summary as one line of the JSONL file """
+        with open(self.path, "a") as f:
+            f.write(json.dumps(self.summary()) + "\n")
+
+    def report(self):
+        """ The counters as text for status output """
+        lines = [f"Evaluations/sec: {self.evaluations_per_second():.0f}"]
+        for kind, timers in self.times.items():
+            for name, (calls, seconds) in timers.items():
+                lines.append(f"{kind:<10} {name:<24}{calls:>10} calls {seconds:>10.3f}s")
+        return "\n".join(lines)
@@ -0,0 +1,68 @@
+"""
+File: reporter.py
+Description: Streaming Pareto front reports for Evo. Each report records
+            only what changed in the front since the last one: the compact
+            IDs and objective vectors of new solutions and the IDs of those
+            that left. Full solution matrices are written only on demand
+            (Evo.save_front stores them with the same IDs).
+"""
+
+import json
+import os
+
+
+def solution_id(key):
+    """ Compact ID of a solution: the first 8 bytes of its content key, in hex """
+    return key[:8].hex()
+
+
+class FrontReporter:
+    """ Writes front snapshots as JSON lines to a file and/or passes them to a callback.
+    Each record holds iteration, evaluations, size, added ([id, *scores] rows) and
+    removed (ids); replay them with read_fronts to get the front at every report. """
+
+    def __init__(self, path=None, callback=None, resume=False):
+        """ path: JSONL file to append records to (None for no file)
+        callback: function called with each record dict (None for no callback)
+        resume: continue an existing file (e.g. after Evo.resume), so the first record
+                holds the changes from the front its records replay to """
+        self.path = path
+        self.callback = callback
+        self.front = {}  # id --> scores of the front at the last report
+        self.records = 0
+        if resume and path is not None and os.path.exists(path):
+            for _, front in read_fronts(path):
+                self.front = front
+                self.records += 1
+
+    def report(self, evo, iteration):
+        """ Record the changes in evo's current population since the last report """
+        pop = evo.pop
+        front = {solution_id(pop.keys[i]): row for i, row in enumerate(pop.scores[:len(pop)].tolist())}
+        record = {'iteration': iteration,
+                  'evaluations': evo.evaluations,
+                  'size': len(front),
+                  'added': [[sid] + row for sid, row in front.items() if sid not in self.front],
+                  'removed': [sid for sid in self.front if sid not in front]}
+        self.front = front
+        self.records += 1
+
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+
+def read_fronts(path):
+    """ Replay a FrontReporter file, yielding (iteration, {id: scores}) for every report """
+    front = {}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            for sid in record['removed']:
+                del front[sid]
+            for sid, *scores in record['added']:
+                front[sid] = scores
+            yield record['iteration'], dict(front)
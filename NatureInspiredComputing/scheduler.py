@@ -0,0 +1,99 @@
+"""
+File: scheduler.py
+Description: Agent schedulers for Evo. A scheduler picks which agent runs
+            next and keeps per-agent statistics: invocations, accepted
+            children (new non-dominated solutions) and time spent.
+"""
+
+
+class Scheduler:
+    """ Base class: keeps per-agent statistics; subclasses decide which agent runs next """
+
+    def __init__(self):
+        self.stats = {}  # agent name --> {'calls', 'accepted', 'seconds'}
+
+    def pick(self, names, rng):
+        """ Name of the next agent to run, drawn with rng (a numpy Generator) """
+        raise NotImplementedError
+
+    def record(self, name, accepted, seconds):
+        """ Record one invocation of an agent: whether its child was accepted
+        and how long the agent plus evaluation took """
+        st = self.stats.setdefault(name, {'calls': 0, 'accepted': 0, 'seconds': 0.0})
+        st['calls'] += 1
+        st['accepted'] += int(accepted)
+        st['seconds'] += seconds
+
+    def probabilities(self, names):
+        """ Current probability of picking each agent """
+        return {name: 1 / len(names) for name in names}
+
+    def summary(self):
+        """ Per-agent statistics with success rate and seconds per accepted child """
+        rows = {}
+        probabilities = self.probabilities(list(self.stats))
+        for name, st in self.stats.items():
+            rows[name] = {**st,
+                          'success_rate': st['accepted'] / st['calls'] if st['calls'] else 0.0,
+                          'seconds_per_accept': st['seconds'] / st['accepted'] if st['accepted'] else float('inf'),
+                          'probability': probabilities.get(name, 0.0)}
+        return rows
+
+    def report(self):
+        """ Per-agent statistics as text for status output """
+        lines = [f"{'agent':<20}{'calls':>10}{'accepted':>10}{'success':>9}{'s/accept':>11}{'p':>7}"]
+        for name, row in self.summary().items():
+            lines.append(f"{name:<20}{row['calls']:>10}{row['accepted']:>10}{row['success_rate']:>9.2%}"
+                         f"{row['seconds_per_accept']:>11.2e}{row['probability']:>7.2f}")
+        return "\n".join(lines)
+
+
+class UniformScheduler(Scheduler):
+    """ Pick every agent with equal probability (the original behaviour) """
+
+    def pick(self, names, rng):
+        return names[rng.integers(len(names))]
+
+
+class AdaptiveScheduler(Scheduler):
+    """ Multi-armed bandit over agents: each agent is picked in proportion to its
+    recent accepted children per second of compute (probability matching),
+    with a floor of p_min so no agent is starved. Agents are first tried
+    `warmup` times each. Older results fade by `decay` per invocation.
+    With timed=False agents are rated per call instead of per second, so the picks
+    depend only on the random stream and a seeded run repeats exactly. """
+
+    def __init__(self, p_min=0.05, decay=0.995, warmup=20, timed=True):
+        super().__init__()
+        self.p_min = p_min
+        self.decay = decay
+        self.warmup = warmup
+        self.timed = timed
+        self.recent = {}  # agent name --> [decayed accepted count, decayed seconds (or calls)]
+
+    def record(self, name, accepted, seconds):
+        super().record(name, accepted, seconds)
+        recent = self.recent.setdefault(name, [0.0, 0.0])
+        recent[0] = self.decay * recent[0] + int(accepted)
+        recent[1] = self.decay * recent[1] + (seconds if self.timed else 1)
+
+    def probabilities(self, names):
+        if not names:
+            return {}
+        # accepted children per second, with a small prior so unproductive agents keep a share
+        rates = {}
+        for name in names:
+            accepted, seconds = self.recent.get(name, (0.0, 0.0))
+            rates[name] = (accepted + 0.1) / (seconds + 1e-6)
+        total = sum(rates.values())
+        p_min = min(self.p_min, 1 / len(names))
+        return {name: p_min + (1 - p_min * len(names)) * rate / total for name, rate in rates.items()}
+
+    def pick(self, names, rng):
+        # try every agent a few times before trusting the statistics
+        for name in names:
+            if self.stats.get(name, {'calls': 0})['calls'] < self.warmup:
+                return name
+        probabilities = self.probabilities(names)
+        total = sum(probabilities.values())
+        return names[rng.choice(len(names), p=[probabilities[name] / total for name in names])]
@@ -0,0 +1,193 @@
+"""
+File: sparse_assignment.py
+Description: A sparse (CSR) encoding of TA assignments, with the five
+            assignta objectives and the mutation / crossover agents working
+            on it directly. Memory and scoring cost grow with the number of
+            assignments rather than with TAs x sections.
+
+            E = evo.Evo(dtype=object)
+            E.add_batch_objective(OBJECTIVES, partial(sparse_objectives, problem=problem))
+"""
+
+import numpy as np
+from assignta import _RNG
+
+
+class SparseAssignment:
+    """ A (TAs x sections) 0/1 assignment in CSR form: the sections assigned
+    to TA i are indices[indptr[i]:indptr[i+1]], in increasing order """
+
+    def __init__(self, indptr, indices, shape):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.shape = tuple(shape)
+
+    @classmethod
+    def from_cells(cls, rows, cols, shape):
+        """ Assignment with a 1 at each (row, col) cell; repeated cells count once """
+        keys = np.unique(np.asarray(rows, dtype=np.int64) * shape[1] + np.asarray(cols, dtype=np.int64))
+        rows, cols = np.divmod(keys, shape[1])
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols, shape)
+
+    @classmethod
+    def from_dense(cls, solution):
+        """ Sparse form of a dense 0/1 solution matrix """
+        rows, cols = np.nonzero(solution)
+        return cls.from_cells(rows, cols, np.shape(solution))
+
+    @classmethod
+    def random(cls, shape, assignments, rng=None):
+        """ Random assignment with up to `assignments` ones, drawn from rng (a numpy Generator) """
+        rng = _RNG if rng is None else rng
+        rows = rng.integers(0, shape[0], size=assignments)
+        cols = rng.integers(0, shape[1], size=assignments)
+        return cls.from_cells(rows, cols, shape)
+
+    @property
+    def nnz(self):
+        """ Number of assignments """
+        return len(self.indices)
+
+    def rows(self):
+        """ TA of each assignment, aligned with indices """
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def to_dense(self, dtype=np.uint8):
+        solution = np.zeros(self.shape, dtype=dtype)
+        solution[self.rows(), self.indices] = 1
+        return solution
+
+    def copy(self):
+        return SparseAssignment(self.indptr.copy(), self.indices.copy(), self.shape)
+
+    def tobytes(self):
+        """ Raw bytes of the encoding, for content keys """
+        return self.indptr.tobytes() + self.indices.tobytes()
+
+    def flip(self, row, col):
+        """ A new assignment with the (row, col) cell flipped """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        pos = start + np.searchsorted(self.indices[start:end], col)
+        indptr = self.indptr.copy()
+        if pos < end and self.indices[pos] == col:
+            indices = np.delete(self.indices, pos)
+            indptr[row + 1:] -= 1
+        else:
+            indices = np.insert(self.indices, pos, col)
+            indptr[row + 1:] += 1
+        return SparseAssignment(indptr, indices, self.shape)
+
+    def __eq__(self, other):
+        return (isinstance(other, SparseAssignment) and self.shape == other.shape
+                and np.array_equal(self.indptr, other.indptr) and np.array_equal(self.indices, other.indices))
+
+    def __repr__(self):
+        return f"SparseAssignment(shape={self.shape}, nnz={self.nnz})"
+
+    def __str__(self):
+        return str(self.to_dense())
+
+
+def sparse_overallocation(solution, problem):
+    '''
+    :param solution: SparseAssignment
+    :param problem: AssignTAProblem
+    :return: the sum of the amounts TAs go over their max labs
+    '''
+    loads = np.diff(solution.indptr)
+    return int(np.maximum(loads - problem.max_assigned, 0).sum())
+
+
+def sparse_conflicts(solution, problem):
+    '''
+    :param solution: SparseAssignment
+    :param problem: AssignTAProblem
+    :return: the number of TAs with two or more labs at the same time
+    '''
+    n_slots = problem.slots.shape[1]
+    keys, counts = np.unique(solution.rows() * n_slots + problem.lab_times[solution.indices],
+                             return_counts=True)
+    return len(np.unique(keys[counts > 1] // n_slots))
+
+
+def sparse_undersupport(solution, problem):
+    '''
+    :param solution: SparseAssignment
+    :param problem: AssignTAProblem
+    :return: the total number of TAs missing across all labs
+    '''
+    coverage = np.bincount(solution.indices, minlength=solution.shape[1])
+    return int(np.maximum(problem.min_ta - coverage, 0).sum())
+
+
+def sparse_unavailable(solution, problem):
+    '''
+    :param solution: SparseAssignment
+    :param problem: AssignTAProblem
+    :return: the number of assignments on unavailable ('U') slots
+    '''
+    return int(problem.unavailable_mask[solution.rows(), solution.indices].sum())
+
+
+def sparse_unpreferred(solution, problem):
+    '''
+    :param solution: SparseAssignment
+    :param problem: AssignTAProblem
+    :return: the number of assignments on unpreferred ('W') slots
+    '''
+    return int(problem.unpreferred_mask[solution.rows(), solution.indices].sum())
+
+
+def sparse_objectives(solutions, problem):
+    '''
+    Score a list of sparse solutions for all five objectives.
+    :param solutions: list of SparseAssignment
+    :param problem: AssignTAProblem
+    :return: an (N x 5) int array of scores, columns ordered as assignta.OBJECTIVES
+    '''
+    functions = (sparse_overallocation, sparse_conflicts, sparse_undersupport,
+                 sparse_unavailable, sparse_unpreferred)
+    return np.array([[f(sol, problem) for f in functions] for sol in solutions], dtype=np.int64)
+
+
+def sparse_one_mutation(solutions, rng=_RNG):
+    # flip one random cell of the first solution
+    solution = solutions[0]
+    rows, cols = solution.shape
+    return solution.flip(rng.integers(0, rows), rng.integers(0, cols))
+
+
+def sparse_crossover_rows(solutions, rng=_RNG):
+    # the first solution's TAs above a random row, the second's from that row on
+    sol1, sol2 = solutions
+    point = rng.integers(1, sol1.shape[0])
+    indptr = np.concatenate((sol1.indptr[:point + 1], sol2.indptr[point + 1:] - sol2.indptr[point] + sol1.indptr[point]))
+    indices = np.concatenate((sol1.indices[:sol1.indptr[point]], sol2.indices[sol2.indptr[point]:]))
+    return SparseAssignment(indptr, indices, sol1.shape)
+
+
+def sparse_crossover_columns(solutions, rng=_RNG):
+    # the first solution's sections left of a random column, the second's from that column on
+    sol1, sol2 = solutions
+    point = rng.integers(1, sol1.shape[1])
+    left = sol1.indices < point
+    right = sol2.indices >= point
+    return SparseAssignment.from_cells(np.concatenate((sol1.rows()[left], sol2.rows()[right])),
+                                       np.concatenate((sol1.indices[left], sol2.indices[right])), sol1.shape)
+
+
+def sparse_randomize(solutions, rng=_RNG):
+    # move up to 10% of the assignments to random cells; unlike the dense randomize,
+    # which flips up to 10% of all cells, this keeps a sparse solution sparse
+    solution = solutions[0]
+    rows, cols = solution.shape
+    num_changes = rng.integers(1, max(2, solution.nnz // 10 + 1))
+
+    keep = np.ones(solution.nnz, dtype=bool)
+    keep[rng.integers(0, max(solution.nnz, 1), size=num_changes if solution.nnz else 0)] = False
+    new_rows = rng.integers(0, rows, size=num_changes)
+    new_cols = rng.integers(0, cols, size=num_changes)
+    return SparseAssignment.from_cells(np.concatenate((solution.rows()[keep], new_rows)),
+                                       np.concatenate((solution.indices[keep], new_cols)), solution.shape)
@@ -0,0 +1,137 @@
+"""
+File: stopping.py
+Description: Stopping criteria and convergence tracking for Evo runs.
+            Criteria are checked after each dominance pass; the tracker
+            records how the non-dominated front improves over time.
+"""
+
+import time
+import numpy as np
+
+
+class ConvergenceTracker:
+    """ Records front size and a Monte Carlo hypervolume estimate at each check.
+    The hypervolume is the share of a fixed cloud of sample points (inside the box
+    between `ideal` and `ref`) dominated by the front. Dominated points never lose
+    that status as the front improves, so each check only tests new front members. """
+
+    def __init__(self, samples=4096, ref=None, ideal=None, seed=0):
+        """ samples: # of Monte Carlo points
+        ref: worst corner of the box (defaults to 1 past the worst initial scores)
+        ideal: best corner of the box (defaults to 0, or the best initial scores if negative)
+        seed: seed for the sample points, independent of the evolution's RNG """
+        self.samples = samples
+        self.ref = ref
+        self.ideal = ideal
+        self.seed = seed
+        self.points = None  # (samples, # objectives) sample cloud
+        self.covered = None  # which samples the front dominates so far
+        self.volume = None  # volume of the sampling box
+        self.front = set()  # score rows (as bytes) of the last front seen
+        self.start_time = time.time()
+        self.history = []  # one record per check
+
+    def _setup(self, scores):
+        """ Fix the sampling box from the first front seen """
+        ref = scores.max(axis=0) + 1 if self.ref is None else np.asarray(self.ref, dtype=float)
+        ideal = np.minimum(scores.min(axis=0), 0) if self.ideal is None else np.asarray(self.ideal, dtype=float)
+        rng = np.random.default_rng(self.seed)
+        self.points = ideal + rng.random((self.samples, len(ref))) * (ref - ideal)
+        self.covered = np.zeros(self.samples, dtype=bool)
+        self.volume = float(np.prod(ref - ideal))
+
+    def update(self, scores, iteration=0, evaluations=0):
+        """ Record a check for the current front (an (N, # objectives) score matrix) """
+        scores = np.asarray(scores, dtype=float)
+        if self.points is None:
+            self._setup(scores)
+
+        # only front members not seen at the last check can cover new samples
+        # tied solutions share a score row, so the front is compared as a set of rows
+        keys = [row.tobytes() for row in scores]
+        front = set(keys)
+        new = [i for i, key in enumerate(keys) if key not in self.front]
+        changed = front != self.front
+        for i in new:
+            open_points = ~self.covered
+            self.covered[open_points] = np.all(scores[i] <= self.points[open_points], axis=1)
+        self.front = front
+
+        record = {'iteration': iteration,
+                  'evaluations': evaluations,
+                  'elapsed': time.time() - self.start_time,
+                  'front_size': len(keys),
+                  'hypervolume': self.covered.mean() * self.volume,
+                  'changed': changed}
+        self.history.append(record)
+        return record
+
+
+class StoppingCriterion:
+    """ Base class: after each check, should_stop tells Evo whether to stop """
+
+    reason = "stopping criterion met"
+
+    def start(self, evo):
+        """ Called once when evolution starts """
+        pass
+
+    def should_stop(self, evo, tracker):
+        """ True to stop evolving """
+        return False
+
+
+class WallTime(StoppingCriterion):
+    """ Stop after a number of seconds """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.reason = f"Time limit of {seconds} seconds reached"
+
+    def start(self, evo):
+        self.start_time = time.time()
+
+    def should_stop(self, evo, tracker):
+        return time.time() - self.start_time > self.seconds
+
+
+class EvaluationBudget(StoppingCriterion):
+    """ Stop once a number of solutions have been evaluated in this run """
+
+    def __init__(self, evaluations):
+        self.evaluations = evaluations
+        self.reason = f"Evaluation budget of {evaluations} reached"
+
+    def start(self, evo):
+        self.first = evo.evaluations
+
+    def should_stop(self, evo, tracker):
+        return evo.evaluations - self.first >= self.evaluations
+
+
+class HypervolumeStagnation(StoppingCriterion):
+    """ Stop when the hypervolume grew by less than a relative tol over the last window checks """
+
+    def __init__(self, window=20, tol=1e-3):
+        self.window = window
+        self.tol = tol
+        self.reason = f"Hypervolume improved by a relative {tol:g} or less over {window} checks"
+
+    def should_stop(self, evo, tracker):
+        if len(tracker.history) <= self.window:
+            return False
+        old = tracker.history[-self.window - 1]['hypervolume']
+        new = tracker.history[-1]['hypervolume']
+        return new - old <= self.tol * max(abs(old), 1e-12)
+
+
+class FrontUnchanged(StoppingCriterion):
+    """ Stop when the non-dominated front has not changed for k checks in a row """
+
+    def __init__(self, k=20):
+        self.k = k
+        self.reason = f"Front unchanged for {k} checks"
+
+    def should_stop(self, evo, tracker):
+        recent = tracker.history[-self.k:]
+        return len(recent) == self.k and not any(record['changed'] for record in recent)
@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 from assignta import overallocation, conflicts, undersupport, unavailable, unpreferred
+from assignta import OBJECTIVES, AssignTAProblem, time_slot_matrix, batch_objectives, pack, unpack
 import pytest
 import io
 import sys
@@ -20,6 +21,9 @@ lab_times = sections_df['daytime']
 min_ta = sections_df['min_ta']
 availability_matrix = tas_df.drop(columns=['ta_id', 'name', 'max_assigned']).to_numpy()
 
+# the same parameters compiled into a problem context
+problem = AssignTAProblem(sections_df, tas_df)
+
 # create the table of expected values based on the assignment instructions.
 expected_values = {
     "Overallocation": [34, 37, 19],
@@ -55,6 +59,39 @@ def test_unpreferred():
     assert unpreferred(test2, availability_matrix) == expected_values['Unpreferred'][1]
     assert unpreferred(test3, availability_matrix) == expected_values['Unpreferred'][2]
 
+def test_batch_objectives():
+    # scoring all three tests as one stack should match the expected values column by column
+    scores = batch_objectives(np.stack([test1, test2, test3]), time_slot_matrix(lab_times),
+                              max_assigned.to_numpy(), min_ta.to_numpy(),
+                              availability_matrix == 'U', availability_matrix == 'W')
+    for col, name in enumerate(OBJECTIVES):
+        assert scores[:, col].tolist() == expected_values[name]
+
+def test_problem_context():
+    # every objective should give the same scores when handed the problem context
+    functions = [overallocation, conflicts, undersupport, unavailable, unpreferred]
+    for test, i in zip([test1, test2, test3], range(3)):
+        for f, name in zip(functions, OBJECTIVES):
+            assert f(test, problem) == expected_values[name][i]
+        assert problem.evaluate(test[None])[0].tolist() == [expected_values[name][i] for name in OBJECTIVES]
+
+def test_delta_stats():
+    # walking test1 -> test2 -> test3 cell by cell should land on the expected scores
+    stats = problem.stats(test1)
+    for test, i in zip([test2, test3], [1, 2]):
+        previous = test1 if i == 1 else test2
+        cells = np.argwhere(test != previous)
+        stats = problem.delta(stats, test, cells)
+        assert list(stats.scores) == [expected_values[name][i] for name in OBJECTIVES]
+
+def test_packed_objectives():
+    # popcount scoring of the bit-packed tests should match the expected values
+    packed = pack(np.stack([test1, test2, test3]))
+    assert (unpack(packed, test1.shape[1]) == np.stack([test1, test2, test3])).all()
+    scores = problem.evaluate_packed(packed)
+    for col, name in enumerate(OBJECTIVES):
+        assert scores[:, col].tolist() == expected_values[name]
+
 
 def main():
     # Create a StringIO object to capture pytest output
@@ -68,4 +105,4 @@ def main():
         f.write(output.getvalue())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,401 @@
+import json
+import os
+import numpy as np
+import pytest
+from evo import Evo, Population, non_dominated, load_front
+from stopping import EvaluationBudget, FrontUnchanged
+from scheduler import AdaptiveScheduler
+from instrumentation import RunStats
+
+
+def brute_force_front(scores):
+    # a row survives when no other row dominates it under Evo._dominates
+    evals = [tuple(enumerate(row)) for row in scores.tolist()]
+    return np.array([not any(Evo._dominates(p, q) for p in evals) for q in evals])
+
+
+def test_non_dominated():
+    # compare against the pairwise definition for every sweep (1, 2, 3 and 5 objectives)
+    rng = np.random.default_rng(0)
+    for k in [1, 2, 3, 5]:
+        scores = rng.integers(0, 8, size=(200, k))
+        assert (non_dominated(scores) == brute_force_front(scores)).all()
+
+
+def test_non_dominated_keeps_duplicates():
+    # equal score vectors do not dominate each other
+    scores = np.array([[1, 2, 3], [1, 2, 3], [2, 2, 3], [0, 5, 5]])
+    assert non_dominated(scores).tolist() == [True, True, False, True]
+
+
+def test_population_compact():
+    # slots grow past the initial capacity and compaction keeps the chosen rows in order
+    pop = Population(names=("a", "b"), capacity=2, dtype=np.uint8)
+    for i in range(5):
+        pop.add(np.full((2, 3), i), [i, -i])
+    assert len(pop) == 5 and pop.solutions.dtype == np.uint8
+    pop.compact(np.array([True, False, True, False, True]))
+    assert pop.scores[:len(pop)].tolist() == [[0, 0], [2, -2], [4, -4]]
+    assert [sol[0, 0] for _, sol in pop.items()] == [0, 2, 4]
+
+
+def test_remove_dominated_keeps_newest_tie():
+    # like the old dict keyed by evaluation, a later solution with equal scores replaces the earlier one
+    E = Evo()
+    E.add_objective("total", lambda sol: sol.sum())
+    for sol in [np.array([1, 0]), np.array([0, 1]), np.array([1, 1])]:
+        E.add_solution(sol)
+    E.remove_dominated()
+    assert [sol.tolist() for _, sol in E.pop.items()] == [[0, 1]]
+
+
+def test_agent_picks():
+    # mutating agents work on scratch copies; non-mutating agents get read-only views
+    E = Evo()
+    E.add_objective("total", lambda sol: sol.sum())
+    E.add_solution(np.zeros((2, 2), dtype=int))
+    seen = []
+
+    def flip(solutions):
+        solutions[0][0, 0] = 1
+        return solutions[0]
+
+    def look(solutions):
+        seen.append(solutions[0].flags.writeable)
+        return solutions[0] + 1
+
+    E.add_agent("flip", flip)
+    E.add_agent("look", look, mutates=False)
+    E.run_agent("flip")
+    E.run_agent("look")
+    assert E.pop.solutions[0].tolist() == [[0, 0], [0, 0]]
+    assert E.pop.scores[:2, 0].tolist() == [0, 1] and E.pop.scores[2, 0] in (4, 5)
+    assert seen == [False]
+
+
+def count_ones(sol):
+    return sol.sum()
+
+
+def count_zeros(sol):
+    return sol.size - sol.sum()
+
+
+def flip_first(solutions, rng):
+    solutions[0][rng.integers(solutions[0].size)] ^= 1
+    return solutions[0]
+
+
+def test_tracker_ties():
+    # a front with tied score rows counts as unchanged when it comes back the same
+    from stopping import ConvergenceTracker
+    tracker = ConvergenceTracker()
+    front = np.array([[0, 2], [1, 1], [1, 1], [2, 0]])
+    for i in range(3):
+        tracker.update(front, i)
+    tracker.update(front[:3], 3)
+    assert [record['changed'] for record in tracker.history] == [True, False, False, True]
+
+
+def make_flipper(seed=None, agent=flip_first, **kwargs):
+    # ones / zeros objectives and a flip agent: the front is every split of the bits
+    E = Evo(seed=seed, **kwargs)
+    E.add_objective("ones", count_ones)
+    E.add_objective("zeros", count_zeros)
+    E.add_agent("flip", agent)
+    return E
+
+
+def test_evolve_islands():
+    # islands evolve separately and merge into one front of mutually non-dominated solutions
+    E = make_flipper()
+    E.add_solution(np.zeros(6, dtype=int))
+    E.evolve_islands(islands=2, n=200, dom=10, migrate=50, migrants=3)
+    scores = E.pop.scores[:len(E.pop)]
+    assert len(E.pop) > 1 and non_dominated(scores).all()
+    assert (scores.sum(axis=1) == 6).all()
+
+
+def flip_or_fail(solutions, rng):
+    if rng.random() < 0.01:
+        raise RuntimeError("agent failed")
+    return flip_first(solutions, rng)
+
+
+def test_evolve_islands_error():
+    # an island whose agent raises releases the others, and its error reaches the caller
+    E = make_flipper(seed=5)
+    E.add_agent("flip_or_fail", flip_or_fail)
+    E.add_solution(np.zeros(6, dtype=int))
+    with pytest.raises(RuntimeError, match="agent failed"):
+        E.evolve_islands(islands=2, n=2000, dom=10, migrate=50, migrants=3)
+
+
+def flip_batch(parents, rng):
+    children = parents[0]
+    children[np.arange(len(children)), rng.integers(children.shape[1], size=len(children))] ^= 1
+    return children
+
+
+def test_evolve_batches():
+    # a batch objective scores each generation in one call and the front stays non-dominated
+    E = Evo()
+    E.add_batch_objective(("ones", "zeros"), lambda sols: np.column_stack(
+        (sols.sum(axis=1), sols.shape[1] - sols.sum(axis=1))))
+    E.add_batch_agent("flip", flip_batch)
+    E.add_solution(np.zeros(6, dtype=int))
+    E.evolve_batches(n=20, batch=16, status=None)
+    scores = E.pop.scores[:len(E.pop)]
+    assert len(E.pop) > 1 and non_dominated(scores).all()
+    assert (scores.sum(axis=1) == 6).all()
+
+
+def test_stopping_criteria():
+    # a converged front stops the run long before n, and the tracker records each check
+    E = make_flipper()
+    E.add_solution(np.zeros(3, dtype=int))
+    E.evolve(n=100000, dom=10, status=None, stop=[FrontUnchanged(k=50)])
+    assert len(E.tracker.history) < 10000
+    assert not any(record['changed'] for record in E.tracker.history[-50:])
+
+    budget = Evo(memo_size=0)
+    budget.add_objective("ones", count_ones)
+    budget.add_agent("flip", flip_first)
+    budget.add_solution(np.zeros(3, dtype=int))
+    budget.evolve(n=100000, dom=10, status=None, stop=[EvaluationBudget(500)])
+    assert 500 <= budget.evaluations <= 511
+
+
+def test_checkpoint_resume(tmp_path):
+    # a resumed run continues exactly where the checkpointed run left off
+    E = make_flipper(seed=1)
+    E.add_solution(np.zeros(8, dtype=int))
+    E.evolve(n=100, dom=10, status=None)
+    E.save_checkpoint(tmp_path / "run.npz")
+    E.evolve(n=100, dom=10, status=None)
+    umask = os.umask(0)
+    os.umask(umask)
+    assert (tmp_path / "run.npz").stat().st_mode & 0o777 == 0o666 & ~umask
+
+    resumed = make_flipper().resume(tmp_path / "run.npz")
+    assert resumed.iteration == 100
+    resumed.evolve(n=100, dom=10, status=None)
+    assert resumed.iteration == E.iteration == 200
+    assert (resumed.pop.scores[:len(resumed.pop)] == E.pop.scores[:len(E.pop)]).all()
+    assert (resumed.pop.solutions[:len(resumed.pop)] == E.pop.solutions[:len(E.pop)]).all()
+
+
+def test_bit_packed_front(tmp_path):
+    # a bit-packed population hands agents unpacked solutions and round-trips through save_front
+    E = make_flipper(bits=True)
+    E.add_solution(np.zeros(11, dtype=int))
+    E.evolve(n=300, dom=10, status=None)
+    assert E.pop.solutions.shape[1:] == (2,)
+    E.save_front(tmp_path / "front.npz")
+    names, scores, solutions = load_front(tmp_path / "front.npz")
+    assert names == ("ones", "zeros") and solutions.shape == (len(E.pop), 11)
+    assert (solutions.sum(axis=1) == scores[:, 0]).all()
+
+
+def test_memo_and_ties():
+    # re-adding a solution is a memo hit, and max_ties keeps distinct solutions with equal scores
+    calls = []
+    E = Evo(max_ties=None)
+    E.add_objective("ones", lambda sol: calls.append(1) or sol.sum())
+    for sol in [[1, 0, 0], [0, 1, 0], [1, 0, 0], [0, 0, 1]]:
+        E.add_solution(np.array(sol))
+    assert len(calls) == 3 and E.duplicate_rate() == 0.25
+    E.remove_dominated()
+    assert len(E.pop) == 3 and E.pop.index() == {(1,): [0, 1, 2]}
+
+    # keys follow the stored dtype, so the same solution in another dtype is still a duplicate
+    E = Evo(dtype=np.uint8, max_ties=None)
+    E.add_objective("ones", count_ones)
+    E.add_solution(np.eye(3, dtype=np.int64))
+    E.add_solution(np.eye(3, dtype=np.uint8))
+    E.remove_dominated()
+    assert len(E.pop) == 1 and E.duplicate_rate() == 0.5
+
+
+def flip_random(picks, rng):
+    sol = picks[0]
+    sol[rng.integers(len(sol))] ^= 1
+    return sol
+
+
+def test_adaptive_scheduler():
+    # an agent that only returns copies of its parent is never accepted and gets picked less
+    E = make_flipper(seed=2, agent=flip_random, scheduler=AdaptiveScheduler(p_min=0.05, warmup=10))
+    E.add_agent("copy", lambda picks: picks[0])
+    E.add_solution(np.zeros(30, dtype=int))
+    E.evolve(n=2000, dom=10, status=None)
+    stats = E.scheduler.summary()
+    assert stats["copy"]["accepted"] == 0 and stats["flip"]["accepted"] > 0
+    assert stats["flip"]["calls"] > 3 * stats["copy"]["calls"]
+    assert stats["copy"]["probability"] >= 0.05
+
+
+def test_run_stats(tmp_path):
+    # timers cover every objective and agent, and summaries stream to the JSONL file
+    E = make_flipper(seed=4, agent=flip_random, memo_size=0, run_stats=RunStats(tmp_path / "stats.jsonl", every=5))
+    E.add_solution(np.zeros(10, dtype=int))
+    E.evolve(n=200, dom=10, status=None)
+    summary = E.run_stats.summary()
+    assert summary['times']['objective']['ones']['calls'] == E.evaluations == 201
+    assert summary['times']['agent']['flip']['calls'] == 200
+    assert summary['times']['dominance']['remove_dominated']['calls'] > 0
+    assert len(E.run_stats.population) == 21
+    lines = [json.loads(line) for line in open(tmp_path / "stats.jsonl")]
+    assert len(lines) == 5 and lines[-1]['population_size'] == len(E.pop)
+    assert lines[-1]['iteration'] == 200 and lines[-1]['evaluations'] == 201
+
+
+def test_object_population(tmp_path):
+    # sparse solution objects evolve in an object population and resume from a checkpoint
+    from assignta import AssignTAProblem, OBJECTIVES
+    from sparse_assignment import SparseAssignment, sparse_objectives, sparse_one_mutation, sparse_randomize
+    problem = AssignTAProblem.synthetic(tas=30, sections=12, seed=0)
+
+    def make():
+        E = Evo(dtype=object)
+        E.add_batch_objective(OBJECTIVES, lambda sols: sparse_objectives(sols, problem))
+        E.add_agent("one_mutation", sparse_one_mutation, mutates=False)
+        E.add_agent("randomize", sparse_randomize, mutates=False)
+        return E
+
+    E = make()
+    E.add_solution(SparseAssignment.random(problem.shape, 40))
+    E.evolve(n=300, dom=10, status=None)
+    assert all(isinstance(sol, SparseAssignment) for _, sol in E.pop.items())
+    assert (sparse_objectives(E.pop.solutions[:len(E.pop)], problem) == E.pop.scores[:len(E.pop)]).all()
+
+    E.save_checkpoint(tmp_path / "sparse.npz")
+    resumed = make().resume(tmp_path / "sparse.npz", convert=SparseAssignment.from_dense)
+    assert [sol for _, sol in resumed.pop.items()] == [sol for _, sol in E.pop.items()]
+
+
+def test_object_population_islands():
+    # object solutions migrate between islands in dense form and come back as objects
+    from functools import partial
+    from assignta import AssignTAProblem, OBJECTIVES
+    from sparse_assignment import SparseAssignment, sparse_objectives, sparse_one_mutation
+    problem = AssignTAProblem.synthetic(tas=30, sections=12, seed=0)
+    E = Evo(dtype=object, seed=8)
+    E.add_batch_objective(OBJECTIVES, partial(sparse_objectives, problem=problem))
+    E.add_agent("one_mutation", sparse_one_mutation, mutates=False)
+    E.add_solution(SparseAssignment.random(problem.shape, 40, rng=np.random.default_rng(0)))
+    with pytest.raises(ValueError):
+        E.evolve_islands(islands=2, n=100)
+    E.evolve_islands(islands=2, n=200, dom=10, migrate=50, migrants=3, convert=SparseAssignment.from_dense)
+    assert all(isinstance(sol, SparseAssignment) for _, sol in E.pop.items())
+    assert (sparse_objectives(E.pop.solutions[:len(E.pop)], problem) == E.pop.scores[:len(E.pop)]).all()
+
+
+def test_synthetic_problem():
+    # a synthetic problem has the requested shape and scores like any other
+    from assignta import AssignTAProblem, pack
+    problem = AssignTAProblem.synthetic(tas=30, sections=12, seed=3)
+    assert problem.shape == (30, 12)
+    solutions = np.random.default_rng(0).integers(2, size=(4, 30, 12))
+    assert (problem.evaluate(solutions) == problem.evaluate_packed(pack(solutions))).all()
+    assert (AssignTAProblem.synthetic(tas=30, sections=12, seed=3).unavailable_mask == problem.unavailable_mask).all()
+
+
+def test_generated_problem(tmp_path):
+    # generated csvs load like the real data, and both conflicts paths agree on them
+    import pandas as pd
+    from assignta import AssignTAProblem, conflicts
+    from generate import write_problem
+    write_problem(tmp_path, tas=60, sections=30, conflict_density=0.25, seed=1)
+    problem = AssignTAProblem.from_csv(tmp_path / "sections.csv", tmp_path / "tas.csv")
+    assert problem.shape == (60, 30) and problem.slots.shape[1] <= 4
+    lab_times = pd.read_csv(tmp_path / "sections.csv")['daytime'].to_numpy()
+    solutions = np.random.default_rng(0).integers(2, size=(5, 60, 30))
+    scores = problem.evaluate(solutions)
+    assert [conflicts(sol, lab_times) for sol in solutions] == scores[:, 1].tolist()
+    assert [conflicts(sol, problem) for sol in solutions] == scores[:, 1].tolist()
+
+
+def test_sparse_assignment():
+    # the CSR encoding scores and recombines exactly like the dense matrices
+    from sparse_assignment import SparseAssignment, sparse_objectives
+    from sparse_assignment import sparse_one_mutation, sparse_crossover_rows, sparse_crossover_columns
+    from assignta import AssignTAProblem, one_mutation, crossover_rows, crossover_columns
+    problem = AssignTAProblem.synthetic(tas=50, sections=20, seed=2)
+    rng = np.random.default_rng(1)
+    dense = (rng.random((6, 50, 20)) < 0.1).astype(np.uint8)
+    sparse = [SparseAssignment.from_dense(sol) for sol in dense]
+    assert all((s.to_dense() == d).all() for s, d in zip(sparse, dense))
+    assert (sparse_objectives(sparse, problem) == problem.evaluate(dense)).all()
+
+    for sparse_agent, dense_agent, k in [(sparse_one_mutation, one_mutation, 1),
+                                         (sparse_crossover_rows, crossover_rows, 2),
+                                         (sparse_crossover_columns, crossover_columns, 2)]:
+        child = sparse_agent(sparse[:k], rng=np.random.default_rng(5))
+        dense_child = dense_agent([sol.copy() for sol in dense[:k]], rng=np.random.default_rng(5))
+        assert child == SparseAssignment.from_dense(dense_child)
+
+
+def test_repair_agents():
+    # repairs remove one violation without creating new ones elsewhere
+    from assignta import AssignTAProblem, repair_unavailable, repair_conflict
+    problem = AssignTAProblem.synthetic(tas=40, sections=17, seed=4)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        sol = (rng.random(problem.shape) < 0.2).astype(np.uint8)
+        before = problem.stats(sol).scores
+        after = problem.stats(repair_unavailable([sol.copy()], problem, rng=rng)).scores
+        assert after[3] == before[3] - 1 and after[1] <= before[1]
+        after = problem.stats(repair_conflict([sol.copy()], problem, rng=rng)).scores
+        assert after[1] <= before[1] and after[3] <= before[3]
+
+
+def test_seeded_runs_repeat():
+    # the same seed gives the same front in every execution mode
+    def run(mode):
+        E = make_flipper(seed=7)
+        E.add_batch_agent("flip", flip_batch)
+        E.add_solution(np.zeros(12, dtype=int))
+        if mode == "evolve":
+            E.evolve(n=300, dom=10, status=None)
+        elif mode == "batches":
+            E.evolve_batches(n=10, batch=8, status=None)
+        else:
+            E.evolve_islands(islands=2, n=200, dom=10, migrate=50, migrants=3)
+        return E.pop.solutions[:len(E.pop)].tolist(), E.pop.scores[:len(E.pop)].tolist()
+
+    for mode in ("evolve", "batches", "islands"):
+        assert run(mode) == run(mode)
+
+
+def test_front_reporter(tmp_path):
+    # streamed records replay to the final front, whose IDs match those saved with the full solutions
+    from reporter import FrontReporter, read_fronts
+    records = []
+    reporter = FrontReporter(tmp_path / "fronts.jsonl", callback=records.append)
+    E = make_flipper(seed=3)
+    E.add_solution(np.zeros(10, dtype=int))
+    E.evolve(n=500, dom=10, status=100, reporter=reporter)
+    assert len(records) == 6 and records[0]['removed'] == []
+    iteration, front = list(read_fronts(tmp_path / "fronts.jsonl"))[-1]
+    E.save_front(tmp_path / "front.npz")
+    names, scores, solutions, ids = load_front(tmp_path / "front.npz", with_ids=True)
+    assert iteration == 500 and front == dict(zip(ids, scores.tolist()))
+
+
+def test_front_reporter_resume(tmp_path):
+    # a run resumed from a checkpoint continues the stream, which still replays to the live front
+    from reporter import FrontReporter, read_fronts
+    path = tmp_path / "fronts.jsonl"
+    E = make_flipper(seed=6)
+    E.add_solution(np.zeros(10, dtype=int))
+    E.evolve(n=200, dom=10, status=50, reporter=FrontReporter(path))
+    E.save_checkpoint(tmp_path / "run.npz")
+    E.evolve(n=300, dom=10, status=50, reporter=FrontReporter(path, resume=True))  # killed after this
+
+    resumed = make_flipper(seed=6).resume(tmp_path / "run.npz")
+    resumed.evolve(n=100, dom=10, status=50, reporter=FrontReporter(path, resume=True))
+    iteration, front = list(read_fronts(path))[-1]
+    assert iteration == 300
+    assert sorted(front.values()) == sorted(resumed.pop.scores[:len(resumed.pop)].tolist())
+    assert len(front) == len(resumed.pop)